@@ -0,0 +1,143 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from config import (
+    ANALYSIS_CACHE_PATH, ANALYSIS_CACHE_TTL, ANALYSIS_CACHE_MAX_ENTRIES,
+    ANALYSIS_CACHE_LRU_SIZE, ANALYSIS_PROMPT_VERSION, LLM_MODEL
+)
+from db import SQLiteStore
+from metrics import register_collector
+
+def make_cache_key(article: Dict[str, Any], model: str = LLM_MODEL,
+                   prompt_version: int = ANALYSIS_PROMPT_VERSION) -> str:
+    """Hash the prompt inputs together with the model and prompt version"""
+    payload = json.dumps(
+        [model, prompt_version, article.get('title', ''), article.get('summary', ''), article.get('source_name', '')],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class AnalysisCache(SQLiteStore):
+    """On-disk cache of LLM analyses with TTL/size eviction and an in-process LRU"""
+    
+    schema = '''
+        CREATE TABLE IF NOT EXISTS analyses (
+            key TEXT PRIMARY KEY,
+            analysis TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_analyses_last_access ON analyses(last_access);
+    '''
+    
+    def __init__(self, path: str = ANALYSIS_CACHE_PATH, ttl: float = ANALYSIS_CACHE_TTL,
+                 max_entries: int = ANALYSIS_CACHE_MAX_ENTRIES, lru_size: int = ANALYSIS_CACHE_LRU_SIZE):
+        super().__init__(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lru_size = lru_size
+        self.lru: 'OrderedDict[str, tuple]' = OrderedDict()
+        self.counters = {'hits': 0, 'misses': 0, 'lru_hits': 0, 'evictions': 0}
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached analysis for key, or None on a miss"""
+        now = time.time()
+        
+        if self.lru_size:
+            with self.lock:
+                cached = self.lru.get(key)
+                if cached and now - cached[0] < self.ttl:
+                    self.lru.move_to_end(key)
+                    self.counters['hits'] += 1
+                    self.counters['lru_hits'] += 1
+                    return json.loads(cached[1])
+                self.lru.pop(key, None)
+        
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                'SELECT analysis, created_at FROM analyses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or now - row['created_at'] >= self.ttl:
+                self.counters['misses'] += 1
+                return None
+            self.conn.execute('UPDATE analyses SET last_access = ? WHERE key = ?', (now, key))
+            self.counters['hits'] += 1
+        
+        self._remember(key, row['created_at'], row['analysis'])
+        return json.loads(row['analysis'])
+    
+    def put(self, key: str, analysis: Dict[str, Any]):
+        """Store an analysis and evict expired or excess entries"""
+        now = time.time()
+        encoded = json.dumps(analysis, ensure_ascii=False)
+        
+        with self.lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO analyses (key, analysis, created_at, last_access) VALUES (?, ?, ?, ?)',
+                (key, encoded, now, now)
+            )
+            self._evict(now)
+        
+        self._remember(key, now, encoded)
+    
+    def _remember(self, key: str, created_at: float, encoded: str):
+        if not self.lru_size:
+            return
+        with self.lock:
+            self.lru[key] = (created_at, encoded)
+            self.lru.move_to_end(key)
+            while len(self.lru) > self.lru_size:
+                self.lru.popitem(last=False)
+    
+    def _evict(self, now: float):
+        expired = self.conn.execute('DELETE FROM analyses WHERE created_at < ?', (now - self.ttl,)).rowcount
+        count = self.conn.execute('SELECT COUNT(*) FROM analyses').fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                'DELETE FROM analyses WHERE key IN (SELECT key FROM analyses ORDER BY last_access LIMIT ?)',
+                (excess,)
+            )
+        self.counters['evictions'] += expired + max(0, excess)
+    
+    def clear(self):
+        """Remove every cached analysis"""
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM analyses')
+        with self.lock:
+            self.lru.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current cache size"""
+        with self.lock:
+            entries = self.conn.execute('SELECT COUNT(*) FROM analyses').fetchone()[0]
+        lookups = self.counters['hits'] + self.counters['misses']
+        return {
+            **self.counters,
+            'entries': entries,
+            'hit_rate': self.counters['hits'] / lookups if lookups else 0.0
+        }
+
+_cache: Optional[AnalysisCache] = None
+_cache_lock = threading.Lock()
+
+def get_analysis_cache() -> AnalysisCache:
+    """Return the process-wide analysis cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnalysisCache()
+        return _cache
+
+def _collect():
+    # Only report a cache this process has opened
+    if _cache is None:
+        return
+    stats = _cache.stats()
+    for name in ('hits', 'misses', 'lru_hits', 'evictions', 'entries'):
+        yield f'analysis_cache_{name}', {}, stats[name]
+
+register_collector(_collect)
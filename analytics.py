@@ -0,0 +1,239 @@
+import json
+import re
+import threading
+from typing import List, Dict, Any, Optional, Iterable, Iterator
+import numpy as np
+import pandas as pd
+from config import RISK_TERMS, ANALYTICS_FREQ, ARTICLE_STORE_CHUNK_SIZE
+from db import SQLiteStore
+
+def _chunks(records: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _add(total: Optional[pd.DataFrame], part: pd.DataFrame) -> pd.DataFrame:
+    return part if total is None else total.add(part, fill_value=0)
+
+def _dated(frame: pd.DataFrame) -> pd.DataFrame:
+    """Periods in order, without the bucket of undated records"""
+    return frame[frame.index.notna()].sort_index()
+
+class ContributionStore(SQLiteStore):
+    """What each counted article added to the aggregates, so a re-analysis can take it back out.
+
+    Kept in a private temporary SQLite database (on disk, dropped when closed)
+    so memory does not grow with the archive.
+    """
+    
+    schema = '''
+        CREATE TABLE IF NOT EXISTS contributions (
+            url TEXT PRIMARY KEY,
+            category TEXT,
+            source TEXT,
+            period INTEGER,
+            relevance REAL,
+            terms TEXT NOT NULL
+        );
+    '''
+    
+    def __init__(self, risk_terms: List[str]):
+        self.risk_terms = risk_terms
+        super().__init__('')
+    
+    def swap(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Store the frame's rows and return the rows they replace (same columns)"""
+        urls = frame['url'].tolist()
+        periods = [None if pd.isna(period) else period.value for period in frame['period']]
+        relevance = [None if pd.isna(value) else float(value) for value in frame['relevance']]
+        terms = frame[self.risk_terms].to_numpy().tolist()
+        with self.lock, self.conn:
+            rows = self.conn.execute(
+                '''SELECT url, category, source, period, relevance, terms FROM contributions
+                   WHERE url IN (SELECT value FROM json_each(?))''',
+                (json.dumps(urls),)
+            ).fetchall()
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO contributions VALUES (?, ?, ?, ?, ?, ?)',
+                [
+                    (url, category, source, period, score, json.dumps(counts))
+                    for url, category, source, period, score, counts in zip(
+                        urls, frame['category'], frame['source'], periods, relevance, terms
+                    )
+                ]
+            )
+        
+        replaced = pd.DataFrame({
+            'url': [row['url'] for row in rows],
+            'category': [row['category'] for row in rows],
+            'source': [row['source'] for row in rows],
+            'period': pd.to_datetime([row['period'] for row in rows]),
+            'relevance': pd.to_numeric([row['relevance'] for row in rows], errors='coerce')
+        })
+        counts = pd.DataFrame([json.loads(row['terms']) for row in rows], columns=self.risk_terms)
+        return pd.concat([replaced, counts], axis=1) if rows else replaced.reindex(columns=frame.columns)
+
+class ArchiveAnalytics:
+    """Category/source/time-bucket aggregates over analyzed articles.
+
+    Records are consumed in chunks and folded into small aggregate frames, so
+    memory depends on the number of buckets rather than the number of articles.
+    """
+    
+    def __init__(self, freq: str = ANALYTICS_FREQ, risk_terms: List[str] = RISK_TERMS):
+        self.freq = freq
+        self.risk_terms = risk_terms
+        self.lock = threading.RLock()
+        self.contributions: Optional[ContributionStore] = None
+        self.reset()
+    
+    def reset(self):
+        with self.lock:
+            self.by_category: Optional[pd.DataFrame] = None  # (category, period) -> count, relevance_sum
+            self.by_source: Optional[pd.DataFrame] = None  # (source, period) -> count
+            self.terms: Optional[pd.DataFrame] = None  # period -> mentions per risk term
+            if self.contributions is not None:
+                self.contributions.close()
+            self.contributions = None  # Created by the first sync
+            self.rows = 0
+            self.cursor = 0
+    
+    def _frame(self, chunk: List[Dict[str, Any]]) -> pd.DataFrame:
+        frame = pd.DataFrame({
+            'url': [record.get('url') for record in chunk],
+            'category': [record.get('category', 'Uncategorized') for record in chunk],
+            'source': [record.get('source', '') for record in chunk],
+            'published_ts': [record.get('published_ts') for record in chunk],
+            'relevance': [record.get('analysis', {}).get('relevance_score', np.nan) for record in chunk],
+            'risks': [' '.join(record.get('analysis', {}).get('risks_opportunities', {}).get('risks', []))
+                      for record in chunk]
+        })
+        published = pd.to_datetime(pd.to_numeric(frame['published_ts'], errors='coerce'), unit='s')
+        # Undated records get a NaT period: counted in the totals, left out of the trends
+        frame['period'] = published.dt.to_period(self.freq).dt.start_time
+        frame['relevance'] = pd.to_numeric(frame['relevance'], errors='coerce')
+        
+        # One vectorized pass per term over the chunk's risk text
+        risks = frame['risks'].str.lower()
+        for term in self.risk_terms:
+            frame[term] = risks.str.count(rf'\b{re.escape(term)}\b')
+        return frame.drop(columns=['published_ts', 'risks'])
+    
+    def _fold(self, frame: pd.DataFrame, sign: int = 1):
+        """Add (or with sign=-1, subtract) a frame's rows to the aggregates"""
+        # Articles without a relevance score are counted but left out of the means ('rated')
+        by_category = frame.groupby(['category', 'period'], dropna=False).agg(
+            count=('relevance', 'size'), rated=('relevance', 'count'), relevance_sum=('relevance', 'sum')
+        )
+        by_source = frame.groupby(['source', 'period'], dropna=False).size().to_frame('count')
+        terms = frame.groupby('period', dropna=False)[self.risk_terms].sum()
+        
+        self.by_category = _add(self.by_category, by_category * sign)
+        self.by_source = _add(self.by_source, by_source * sign)
+        self.terms = _add(self.terms, terms * sign)
+        if sign < 0:
+            # Buckets emptied by a re-analysis would otherwise linger as zero counts
+            self.by_category = self.by_category[self.by_category['count'] > 0]
+            self.by_source = self.by_source[self.by_source['count'] > 0]
+    
+    def add_records(self, records: Iterable[Dict[str, Any]], chunk_size: int = ARTICLE_STORE_CHUNK_SIZE) -> int:
+        """Fold records into the aggregates chunk by chunk; returns how many were added"""
+        added = 0
+        for chunk in _chunks(records, chunk_size):
+            frame = self._frame(chunk)
+            with self.lock:
+                self._fold(frame)
+                self.rows += len(frame)
+            added += len(frame)
+        return added
+    
+    def sync(self, store, chunk_size: int = ARTICLE_STORE_CHUNK_SIZE) -> int:
+        """Fold in articles written to the store since the last sync; re-analyzed ones replace their old figures"""
+        with self.lock:
+            if self.contributions is None:
+                self.contributions = ContributionStore(self.risk_terms)
+            
+            def changes():
+                for article, cursor in store.iter_since(self.cursor, chunk_size):
+                    self.cursor = cursor
+                    yield article
+            
+            added = 0
+            for chunk in _chunks(changes(), chunk_size):
+                frame = self._frame(chunk).drop_duplicates('url', keep='last')
+                replaced = self.contributions.swap(frame)
+                if len(replaced):
+                    self._fold(replaced, sign=-1)
+                self._fold(frame)
+                self.rows += len(frame) - len(replaced)
+                added += len(frame)
+            return added
+    
+    def category_counts(self) -> Dict[str, int]:
+        with self.lock:
+            if self.by_category is None:
+                return {}
+            counts = self.by_category['count'].groupby(level='category').sum()
+        return {category: int(count) for category, count in counts.items()}
+    
+    def source_counts(self) -> Dict[str, int]:
+        with self.lock:
+            if self.by_source is None:
+                return {}
+            counts = self.by_source['count'].groupby(level='source').sum()
+        return {source: int(count) for source, count in counts.items()}
+    
+    def relevance_trends(self) -> pd.DataFrame:
+        """Mean relevance_score per period (rows) and category (columns)"""
+        with self.lock:
+            if self.by_category is None:
+                return pd.DataFrame()
+            mean = self.by_category['relevance_sum'] / self.by_category['rated'].replace(0, np.nan)
+        return _dated(mean.unstack('category'))
+    
+    def volume_trends(self) -> pd.DataFrame:
+        """Article count per period (rows) and category (columns)"""
+        with self.lock:
+            if self.by_category is None:
+                return pd.DataFrame()
+            counts = self.by_category['count']
+        return _dated(counts.unstack('category', fill_value=0))
+    
+    def risk_term_trends(self) -> pd.DataFrame:
+        """Mentions of each risk term in the risks lists, per period"""
+        with self.lock:
+            if self.terms is None:
+                return pd.DataFrame()
+            terms = self.terms.copy()
+        terms = _dated(terms)
+        return terms.loc[:, terms.sum() > 0]
+    
+    def summary(self) -> Dict[str, Any]:
+        """Totals suitable for a report"""
+        with self.lock:
+            relevance = None
+            if self.by_category is not None:
+                grouped = self.by_category.groupby(level='category').sum()
+                relevance = (grouped['relevance_sum'] / grouped['rated'].replace(0, np.nan)).dropna().round(2).to_dict()
+            return {
+                'total_articles': self.rows,
+                'categories': self.category_counts(),
+                'sources': self.source_counts(),
+                'mean_relevance_by_category': relevance or {}
+            }
+
+_analytics: Optional[ArchiveAnalytics] = None
+_analytics_lock = threading.Lock()
+
+def get_archive_analytics() -> ArchiveAnalytics:
+    """Return the process-wide analytics over the article store"""
+    global _analytics
+    with _analytics_lock:
+        if _analytics is None:
+            _analytics = ArchiveAnalytics()
+        return _analytics
@@ -1,24 +1,159 @@
 import streamlit as st
 from datetime import datetime
+import math
 import time
-from utils import fetch_news, analyze_article, format_report, fetch_research_papers
-from config import NEWS_SOURCES, UPDATE_INTERVAL, CATEGORIES, GEMINI_API_KEY, TAVILY_API_KEY
+from utils import format_report, fetch_research_papers, prefetch_research_papers
+from pipeline import run_pipeline
+from analysis_cache import get_analysis_cache
+from feed_cache import get_feed_cache
+from article_store import get_article_store
+from http_client import connection_stats
+from startup import preload_dependencies
+from tag_index import get_tag_index
+from analytics import get_archive_analytics
+from relevance import get_relevance_scorer
+from llm_stream import stream_stats
+from metrics import get_metrics, start_metrics_server
+from source_registry import get_source_registry
+from config import UPDATE_INTERVAL, CATEGORIES, GEMINI_API_KEY, TAVILY_API_KEY, FULLTEXT_ENABLED
 
-def filter_by_tag(data, selected_tag):
-    """Filter items by tag"""
-    if not data or selected_tag == "All":
-        return data
-    return [item for item in data if selected_tag.lower() in 
-            [tag.lower() for tag in item.get('analysis', {}).get('key_insights', [])]]
-
-def get_all_tags(articles):
+def get_all_tags(index):
     """Get unique tags from articles"""
-    tags = set()
-    for article in articles:
-        insights = article.get('analysis', {}).get('key_insights', [])
-        for insight in insights:
-            tags.add(insight.lower())
-    return sorted(list(tags))
+    return index.values('tag')
+
+# Sort options for the article list (ArticleStore orderings)
+SORT_ORDERS = {
+    "Relevance": 'relevance',
+    "Newest": 'published'
+}
+PAGE_SIZES = [10, 25, 50]
+
+# Publish-time windows in days (None = no limit)
+PUBLISHED_WITHIN = {
+    "All time": None,
+    "Last 7 days": 7,
+    "Last 30 days": 30,
+    "Last 90 days": 90,
+    "Last year": 365
+}
+
+def render_article(article):
+    """Render one article; risks, opportunities and research only when details are opened"""
+    also_reported_by = article.get('also_reported_by', [])
+    more_sources = f" (+{len(also_reported_by)} sources)" if also_reported_by else ""
+    with st.expander(f"📄 {article['title']} ({article['source']}){more_sources}"):
+        col1, col2 = st.columns([2, 1])
+        
+        with col1:
+            st.markdown(f"**Category:** `{article['category']}`")
+            
+            st.markdown("**🔍 Key Insights:**")
+            for insight in article['analysis']['key_insights']:
+                st.markdown(f"- {insight}")
+        
+        with col2:
+            st.metric("Relevance Score", f"{article['analysis']['relevance_score']}/10")
+            st.markdown(f"**Source:** [{article['source']}]({article['url']})")
+            if also_reported_by:
+                st.markdown("**Also reported by:**")
+                for report in also_reported_by:
+                    st.markdown(f"- [{report['source']}]({report['url']})")
+        
+        if not st.toggle("Show risks, opportunities & research", key=f"details-{article['url']}"):
+            return
+        
+        col_risks, col_opps, col_research = st.columns(3)
+        with col_risks:
+            st.markdown("**⚠️ Risks:**")
+            for risk in article['analysis']['risks_opportunities']['risks']:
+                st.markdown(f"- {risk}")
+        
+        with col_opps:
+            st.markdown("**💡 Opportunities:**")
+            for opp in article['analysis']['risks_opportunities']['opportunities']:
+                st.markdown(f"- {opp}")
+        
+        with col_research:
+            st.markdown("**📚 Related Research:**")
+            papers = fetch_research_papers(article['category'], api_key=st.session_state.tavily_key)
+            for paper in papers[:2]:
+                st.markdown(f"- [{paper['title']}]({paper['url']})")
+
+def format_labels(labels):
+    return ', '.join(f"{label}={value}" for label, value in labels.items())
+
+def render_diagnostics(gemini_key, tavily_key):
+    """Key status, per-stage timings, counters and gauges from the metrics registry"""
+    with st.expander("🩺 Diagnostics"):
+        st.caption(
+            f"Gemini key: {'✅' if gemini_key else '❌'} · Tavily key: {'✅' if tavily_key else '❌'}"
+        )
+        snapshot = get_metrics().snapshot()
+        
+        timings = [t for t in snapshot['timings'] if t['name'] == 'stage_seconds']
+        if timings:
+            st.markdown("**Stage timings**")
+            st.dataframe(
+                [
+                    {
+                        'stage': format_labels(timing['labels']),
+                        'calls': timing['count'],
+                        'avg (ms)': round(timing['avg'] * 1000, 1),
+                        'total (s)': round(timing['total'], 2)
+                    }
+                    for timing in sorted(timings, key=lambda t: t['total'], reverse=True)
+                ],
+                hide_index=True,
+                use_container_width=True
+            )
+        
+        if snapshot['counters']:
+            st.markdown("**Counters**")
+            st.dataframe(
+                [
+                    {'metric': counter['name'], 'labels': format_labels(counter['labels']), 'value': counter['value']}
+                    for counter in snapshot['counters']
+                ],
+                hide_index=True,
+                use_container_width=True
+            )
+        
+        if snapshot['gauges']:
+            st.markdown("**Gauges**")
+            st.dataframe(
+                [
+                    {'metric': gauge['name'], 'labels': format_labels(gauge['labels']), 'value': gauge['value']}
+                    for gauge in snapshot['gauges']
+                ],
+                hide_index=True,
+                use_container_width=True
+            )
+        
+        sources = get_source_registry().report()
+        if sources:
+            st.markdown("**Sources**")
+            st.dataframe(
+                [
+                    {
+                        'source': source['name'],
+                        'health': source['health'],
+                        'fetches': source['fetches'],
+                        'avg fetch (s)': round(source['avg_fetch_seconds'], 2) if source['avg_fetch_seconds'] is not None else None,
+                        'freshness lag (h)': round(source['freshness_lag'] / 3600, 1) if source['freshness_lag'] is not None else None,
+                        'last error': source['last_error']
+                    }
+                    for source in sources
+                ],
+                hide_index=True,
+                use_container_width=True
+            )
+        
+        st.download_button(
+            "Download metrics (Prometheus)",
+            data=get_metrics().render_prometheus(),
+            file_name="metrics.prom",
+            mime="text/plain"
+        )
 
 def main():
     st.set_page_config(
@@ -27,6 +162,12 @@ def main():
         layout="wide"
     )
     
+    # Warm the fetch/analyze dependencies while the page renders
+    if 'dependencies_preloaded' not in st.session_state:
+        preload_dependencies()
+        start_metrics_server()
+        st.session_state.dependencies_preloaded = True
+    
     st.title("🌍 Climate Risk & Insurance News Analyzer")
     st.write("Real-time analysis of climate risk and insurance news")
     
@@ -35,8 +176,6 @@ def main():
         st.session_state.last_update = None
     if 'reports' not in st.session_state:
         st.session_state.reports = []
-    if 'all_articles' not in st.session_state:
-        st.session_state.all_articles = []
     if 'error_log' not in st.session_state:
         st.session_state.error_log = []
     if 'gemini_key' not in st.session_state:
@@ -53,8 +192,8 @@ def main():
         gemini_key = st.text_input("Gemini API Key", type="password", value=st.session_state.gemini_key)
         tavily_key = st.text_input("Tavily API Key", type="password", value=st.session_state.tavily_key)
         
-        # Debug information (you can remove this later)
-        st.write("Debug: Keys configured:", bool(gemini_key), bool(tavily_key))
+        # Filled in at the end of the run, once this run's work is counted
+        diagnostics = st.container()
         
         # Update session state and config
         if gemini_key != st.session_state.gemini_key or tavily_key != st.session_state.tavily_key:
@@ -66,10 +205,11 @@ def main():
         
         st.markdown("---")
         
+        news_sources = get_source_registry().sources()
         selected_sources = st.multiselect(
             "Select News Sources",
-            options=[s['name'] for s in NEWS_SOURCES],
-            default=[NEWS_SOURCES[0]['name']],
+            options=[s['name'] for s in news_sources],
+            default=[news_sources[0]['name']] if news_sources else [],
             help="Choose the news sources you want to analyze"
         )
         
@@ -79,6 +219,37 @@ def main():
             default=[],
             help="Select categories to filter news articles"
         )
+        
+        published_within = st.selectbox(
+            "Published Within",
+            options=list(PUBLISHED_WITHIN),
+            index=0,
+            help="Limit the archive to recently published articles"
+        )
+        
+        # Keep the shared tag index in step with the store before offering tags
+        tag_index = get_tag_index()
+        tag_index.sync(get_article_store())
+        
+        tag_filter = st.multiselect(
+            "Filter by Tags",
+            options=get_all_tags(tag_index),
+            default=[],
+            help="Show articles whose key insights include the selected tags"
+        )
+        match_all_tags = st.checkbox("Match all selected tags", value=False, disabled=len(tag_filter) < 2)
+        
+        incremental = st.checkbox(
+            "Only process new or updated articles",
+            value=True,
+            help="Skip entries that were already analyzed and merge new results into the stored set"
+        )
+        
+        fulltext = st.checkbox(
+            "Analyze full article text",
+            value=FULLTEXT_ENABLED,
+            help="Download and extract each article's page instead of using the RSS summary (slower)"
+        )
 
     # Main content
     col1, col2 = st.columns([2, 1])
@@ -93,91 +264,167 @@ def main():
                                disabled=not (st.session_state.gemini_key and st.session_state.tavily_key))
         if fetch_button:
             with st.spinner("Fetching and analyzing content..."):
-                all_articles = []
                 errors = []
                 
                 # Progress tracking
                 progress_text = st.empty()
                 progress_bar = st.progress(0)
-                total_sources = len(selected_sources)
+                live_placeholder = st.empty()
+                live_results = live_placeholder.container()
                 
-                for idx, source in enumerate(NEWS_SOURCES):
-                    if source['name'] in selected_sources:
-                        try:
-                            progress_text.text(f"Processing: {source['name']}")
-                            articles = fetch_news(source)
-                            
-                            for article in articles:
-                                analysis = analyze_article(article)
-                                if analysis:
-                                    if not category_filter or analysis['category'] in category_filter:
-                                        all_articles.append(analysis)
-                            
-                            progress = min(1.0, (idx + 1) / total_sources)
-                            progress_bar.progress(progress)
-                            
-                        except Exception as e:
-                            errors.append(f"Error processing {source['name']}: {str(e)}")
+                sources = [s for s in news_sources if s['name'] in selected_sources]
+                analyzed = 0
+                for event in run_pipeline(sources, api_key=st.session_state.gemini_key,
+                                          incremental=incremental, fulltext=fulltext):
+                    if event['type'] == 'error':
+                        errors.append(event['message'])
+                    elif event['type'] == 'feed':
+                        progress_text.text(
+                            f"Fetched {event['articles']} articles from {event['source']} "
+                            f"({event['skipped']} skipped as off-topic)"
+                        )
+                    elif event['type'] == 'article':
+                        analysis = event['result']
+                        if not analysis:
+                            errors.append(f"Could not analyze {event['article']['title']}")
+                        # Copies of an already analyzed story are folded into its card
+                        if analysis and 'duplicate_of' not in event:
+                            analyzed += 1
+                            if not category_filter or analysis['category'] in category_filter:
+                                live_results.markdown(
+                                    f"✅ **{analysis['title']}** ({analysis['source']}) · `{analysis['category']}`"
+                                )
+                        
+                        progress_text.text(f"Analyzed {event['completed']} of {event['total']} articles")
+                        progress_bar.progress(min(1.0, event['completed'] / max(event['total'], 1)))
+                
+                # Warm research lookups for every category so rendering needs no network calls
+                progress_text.text("Fetching related research...")
+                prefetch_research_papers(CATEGORIES, api_key=st.session_state.tavily_key)
                 
                 # Clear progress indicators
                 progress_text.empty()
                 progress_bar.empty()
+                live_placeholder.empty()
                 
                 # Update session state
-                st.session_state.all_articles = all_articles
                 st.session_state.error_log = errors
                 st.session_state.last_update = datetime.now()
                 
                 # Show success/error messages
-                if all_articles:
-                    st.success(f"Successfully analyzed {len(all_articles)} articles")
+                if analyzed:
+                    st.success(f"Successfully analyzed {analyzed} new or updated articles")
+                else:
+                    st.info("No new articles since the last refresh")
                 if errors:
                     st.error("Some errors occurred during processing. Check the error log in settings.")
 
+    # Results may come from this page or the background scheduler; always read the shared store.
+    # Only the visible page is loaded, so sessions don't each hold a copy of the archive.
+    store = get_article_store()
+    tag_index.sync(store)
+    if st.session_state.last_update is None and store.last_updated():
+        st.session_state.last_update = datetime.fromtimestamp(store.last_updated())
+    
+    filters = {'sources': selected_sources, 'categories': category_filter}
+    if PUBLISHED_WITHIN[published_within]:
+        filters['start'] = time.time() - PUBLISHED_WITHIN[published_within] * 86400
+    if tag_filter:
+        filters['urls'] = tag_index.query(tags=tag_filter, match_all_tags=match_all_tags)
+    total_articles = store.count(**filters)
+    
+    # Trends over the whole archive, from aggregates updated incrementally as articles arrive
+    analytics = get_archive_analytics()
+    analytics.sync(store)
+    if analytics.rows:
+        with st.expander("📈 Trends"):
+            relevance_tab, volume_tab, risk_tab = st.tabs(
+                ["Relevance by category", "Articles by category", "Risk terms"]
+            )
+            with relevance_tab:
+                st.line_chart(analytics.relevance_trends())
+            with volume_tab:
+                st.bar_chart(analytics.volume_trends())
+            with risk_tab:
+                risk_trends = analytics.risk_term_trends()
+                if risk_trends.empty:
+                    st.caption("No tracked risk terms mentioned yet")
+                else:
+                    st.line_chart(risk_trends)
+    
     # Display content
-    if st.session_state.all_articles:
-        display_articles = st.session_state.all_articles
-        
+    if total_articles:
         # News Section
         st.header("📰 News Analysis")
-        for article in display_articles:
-            with st.expander(f"📄 {article['title']} ({article['source']})"):
-                col1, col2 = st.columns([2, 1])
-                
-                with col1:
-                    st.markdown(f"**Category:** `{article['category']}`")
-                    
-                    st.markdown("**🔍 Key Insights:**")
-                    for insight in article['analysis']['key_insights']:
-                        st.markdown(f"- {insight}")
-                    
-                    col_risks, col_opps = st.columns(2)
-                    with col_risks:
-                        st.markdown("**⚠️ Risks:**")
-                        for risk in article['analysis']['risks_opportunities']['risks']:
-                            st.markdown(f"- {risk}")
-                    
-                    with col_opps:
-                        st.markdown("**💡 Opportunities:**")
-                        for opp in article['analysis']['risks_opportunities']['opportunities']:
-                            st.markdown(f"- {opp}")
-                
-                with col2:
-                    st.metric("Relevance Score", f"{article['analysis']['relevance_score']}/10")
-                    st.markdown(f"**Source:** [{article['source']}]({article['url']})")
-                    st.markdown("---")
-                    st.markdown("**📚 Related Research:**")
-                    papers = fetch_research_papers(article['category'])
-                    for paper in papers[:2]:
-                        st.markdown(f"- [{paper['title']}]({paper['url']})")
+        
+        sort_col, size_col, page_col = st.columns([2, 1, 1])
+        with sort_col:
+            sort_by = st.selectbox("Sort by", options=list(SORT_ORDERS), index=0)
+        with size_col:
+            page_size = st.selectbox("Per page", options=PAGE_SIZES, index=0)
+        page_count = max(1, math.ceil(total_articles / page_size))
+        with page_col:
+            page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+        
+        # Only the visible page is read and gets widgets
+        start = (page - 1) * page_size
+        st.caption(
+            f"Showing {start + 1}-{min(start + page_size, total_articles)} "
+            f"of {total_articles} articles"
+        )
+        for article in store.query(order_by=SORT_ORDERS[sort_by], limit=page_size, offset=start, **filters):
+            render_article(article)
 
+    with diagnostics:
+        render_diagnostics(gemini_key, tavily_key)
+    
     # Sidebar stats and info
     with st.sidebar:
         if st.session_state.last_update:
             st.markdown("---")
             st.markdown("### 📊 Stats")
             st.write(f"Last updated: {st.session_state.last_update.strftime('%Y-%m-%d %H:%M:%S')}")
-            st.metric("Articles Analyzed", len(st.session_state.all_articles))
+            st.metric("Articles Analyzed", total_articles)
+            cache_stats = get_analysis_cache().stats()
+            st.caption(
+                f"Analysis cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                f"({cache_stats['entries']} stored)"
+            )
+            prefilter_stats = get_relevance_scorer().stats()
+            if prefilter_stats['scored']:
+                missed = prefilter_stats['estimated_missed']
+                st.caption(
+                    f"Pre-filter: {prefilter_stats['calls_avoided']} of {prefilter_stats['scored']} LLM calls avoided, "
+                    + (f"~{missed:.0f} relevant articles missed "
+                       f"({prefilter_stats['shadow_relevant']}/{prefilter_stats['shadowed']} shadow samples relevant)"
+                       if missed is not None else "no shadow samples yet")
+                )
+            llm_stats = stream_stats()
+            if llm_stats['requests']:
+                st.caption(
+                    f"LLM: {llm_stats['avg_result'] or 0:.1f}s to result, "
+                    f"{llm_stats['aborted']} responses cut off early, {llm_stats['wasted_tokens']} tokens wasted, "
+                    f"{llm_stats['failure_rate']:.0%} parse failures"
+                )
+            
+            feed_stats = get_feed_cache().stats()
+            if feed_stats:
+                with st.expander("Feed cache"):
+                    for rss_url, stats in feed_stats.items():
+                        st.caption(
+                            f"{rss_url}: {stats['not_modified_rate']:.0%} not modified, "
+                            f"{stats['bytes_saved'] / 1024:.1f} KB saved, "
+                            f"{stats['avg_parse_time'] * 1000:.1f} ms parse"
+                        )
+            
+            host_stats = connection_stats()
+            if host_stats:
+                with st.expander("Connections"):
+                    for host, stats in host_stats.items():
+                        st.caption(
+                            f"{host}: {stats['requests']} requests over {stats['connections']} connections "
+                            f"({stats['reused']} reused)"
+                        )
             
             if st.session_state.error_log:
                 st.markdown("### ⚠️ Error Log")
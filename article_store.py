@@ -0,0 +1,200 @@
+import json
+import threading
+import time
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from config import ARTICLE_STORE_PATH, ARTICLE_STORE_CHUNK_SIZE
+from db import SQLiteStore
+
+# Orderings accepted by ArticleStore.query, newest/most relevant first
+ORDER_BY = {
+    'published': 'published_ts DESC, url',
+    'relevance': 'relevance_score DESC, published_ts DESC, url',
+    'updated': 'updated_at DESC, url'
+}
+
+class ArticleStore(SQLiteStore):
+    """Analyzed articles keyed by URL, shared by every session and worker.
+
+    Rows are indexed by publish time, source and category so dashboards can
+    page through or stream a time range without loading the archive.
+    """
+    
+    schema = '''
+        CREATE TABLE IF NOT EXISTS articles (
+            url TEXT PRIMARY KEY,
+            source TEXT NOT NULL,
+            category TEXT NOT NULL,
+            publish_date TEXT,
+            record TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_articles_updated_at ON articles(updated_at);
+    '''
+    
+    def migrate(self):
+        columns = self.columns('articles')
+        # Stores written before time-range queries lack the sortable columns; backfill them
+        if 'published_ts' not in columns:
+            self.conn.execute('ALTER TABLE articles ADD COLUMN published_ts REAL')
+            self.conn.execute(
+                '''UPDATE articles SET published_ts = COALESCE(
+                       json_extract(record, '$.published_ts'), updated_at)'''
+            )
+        if 'created_at' not in columns:
+            self.conn.execute('ALTER TABLE articles ADD COLUMN created_at REAL')
+            self.conn.execute('UPDATE articles SET created_at = updated_at')
+        if 'relevance_score' not in columns:
+            self.conn.execute('ALTER TABLE articles ADD COLUMN relevance_score INTEGER')
+            self.conn.execute(
+                "UPDATE articles SET relevance_score = json_extract(record, '$.analysis.relevance_score')"
+            )
+        if 'seq' not in columns:
+            self.conn.execute('ALTER TABLE articles ADD COLUMN seq INTEGER')
+            urls = self.conn.execute('SELECT url FROM articles ORDER BY updated_at, url').fetchall()
+            self.conn.executemany(
+                'UPDATE articles SET seq = ? WHERE url = ?', [(seq, row['url']) for seq, row in enumerate(urls, 1)]
+            )
+        self.conn.executescript('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_articles_seq ON articles(seq);
+            CREATE INDEX IF NOT EXISTS idx_articles_published ON articles(published_ts);
+            CREATE INDEX IF NOT EXISTS idx_articles_source ON articles(source, published_ts);
+            CREATE INDEX IF NOT EXISTS idx_articles_category ON articles(category, published_ts);
+        ''')
+    
+    def upsert(self, results: List[Dict[str, Any]]):
+        """Merge analysis results, replacing earlier analyses of the same URL.
+
+        Every written row gets the next write sequence number, so readers
+        following iter_since never skip a row committed by another process.
+        """
+        with self.lock, self.conn:
+            # Take the write lock first: sequence numbers then follow commit order across processes
+            self.conn.execute('BEGIN IMMEDIATE')
+            now = time.time()
+            last_seq = self.conn.execute('SELECT COALESCE(MAX(seq), 0) FROM articles').fetchone()[0]
+            self.conn.executemany(
+                '''INSERT INTO articles
+                   (url, source, category, publish_date, published_ts, relevance_score, record, updated_at, created_at, seq)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (url) DO UPDATE SET
+                       source = excluded.source,
+                       category = excluded.category,
+                       publish_date = excluded.publish_date,
+                       published_ts = excluded.published_ts,
+                       relevance_score = excluded.relevance_score,
+                       record = excluded.record,
+                       updated_at = excluded.updated_at,
+                       seq = excluded.seq''',
+                [
+                    (
+                        result['url'], result['source'], result['category'],
+                        result.get('publish_date', ''),
+                        # Undated entries are placed at the time they were ingested
+                        result.get('published_ts') or now,
+                        result['analysis']['relevance_score'],
+                        json.dumps(result, ensure_ascii=False), now, now, seq
+                    )
+                    for seq, result in enumerate(results, last_seq + 1)
+                ]
+            )
+    
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Stored analysis for a URL, or None"""
+        with self.lock:
+            row = self.conn.execute('SELECT record FROM articles WHERE url = ?', (url,)).fetchone()
+        return json.loads(row['record']) if row else None
+
+    def _where(self, start: Optional[float] = None, end: Optional[float] = None,
+               sources: Optional[List[str]] = None, categories: Optional[List[str]] = None,
+               urls: Optional[List[str]] = None) -> Tuple[str, List[Any]]:
+        clauses = []
+        params: List[Any] = []
+        if start is not None:
+            clauses.append('published_ts >= ?')
+            params.append(start)
+        if end is not None:
+            clauses.append('published_ts < ?')
+            params.append(end)
+        if sources:
+            clauses.append(f"source IN ({','.join('?' * len(sources))})")
+            params.extend(sources)
+        if categories:
+            clauses.append(f"category IN ({','.join('?' * len(categories))})")
+            params.extend(categories)
+        if urls is not None:
+            # One JSON parameter instead of a placeholder per URL keeps large id sets under SQLite's limit
+            clauses.append('url IN (SELECT value FROM json_each(?))')
+            params.append(json.dumps(list(urls)))
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+    
+    def query(self, order_by: str = 'published', limit: Optional[int] = None, offset: int = 0,
+              **filters) -> List[Dict[str, Any]]:
+        """Return one page of articles matching the filters (start/end timestamps, sources, categories, urls)"""
+        where, params = self._where(**filters)
+        sql = f'SELECT record FROM articles{where} ORDER BY {ORDER_BY[order_by]}'
+        if limit is not None:
+            sql += ' LIMIT ? OFFSET ?'
+            params += [limit, offset]
+        
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [json.loads(row['record']) for row in rows]
+    
+    def count(self, **filters) -> int:
+        """Number of articles matching the filters"""
+        where, params = self._where(**filters)
+        with self.lock:
+            return self.conn.execute(f'SELECT COUNT(*) FROM articles{where}', params).fetchone()[0]
+    
+    def iter_articles(self, chunk_size: int = ARTICLE_STORE_CHUNK_SIZE, **filters) -> Iterator[Dict[str, Any]]:
+        """Stream matching articles oldest first, holding at most one chunk in memory"""
+        where, params = self._where(**filters)
+        where = where + (' AND ' if where else ' WHERE ') + '(published_ts, url) > (?, ?)'
+        last = (float('-inf'), '')
+        
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    f'SELECT record, published_ts, url FROM articles{where} ORDER BY published_ts, url LIMIT ?',
+                    params + [last[0], last[1], chunk_size]
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield json.loads(row['record'])
+            last = (rows[-1]['published_ts'], rows[-1]['url'])
+    
+    def iter_since(self, cursor: int = 0,
+                   chunk_size: int = ARTICLE_STORE_CHUNK_SIZE) -> Iterator[Tuple[Dict[str, Any], int]]:
+        """Stream articles written after a cursor (a write sequence number), oldest write first.
+
+        Yields (article, cursor of the row); a URL written again comes back
+        with its new version.
+        """
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    'SELECT record, seq FROM articles WHERE seq > ? ORDER BY seq LIMIT ?', (cursor, chunk_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                cursor = row['seq']
+                yield json.loads(row['record']), cursor
+    
+    def last_updated(self) -> Optional[float]:
+        """Time of the most recent write, from any process"""
+        with self.lock:
+            row = self.conn.execute('SELECT MAX(updated_at) FROM articles').fetchone()
+        return row[0]
+
+_store: Optional[ArticleStore] = None
+_store_lock = threading.Lock()
+
+def get_article_store() -> ArticleStore:
+    """Return the process-wide article store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArticleStore(ARTICLE_STORE_PATH)
+        return _store
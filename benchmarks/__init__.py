@@ -0,0 +1 @@
+"""Offline benchmarks: recorded feed fixtures, a mock LLM/Tavily server and scenario drivers (see run.py)"""
@@ -0,0 +1,65 @@
+"""Micro-benchmark of clean_html against a BeautifulSoup parse per snippet.
+
+Uses the descriptions (and content:encoded bodies) of the recorded feed fixtures:
+
+    python -m benchmarks.html_clean
+    python -m benchmarks.html_clean --repeat 500
+"""
+import argparse
+import glob
+import os
+import sys
+import timeit
+import xml.etree.ElementTree as ET
+from typing import List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.mock_server import FIXTURES_DIR
+
+CONTENT_ENCODED = '{http://purl.org/rss/1.0/modules/content/}encoded'
+
+def load_snippets(fixtures_dir: str = FIXTURES_DIR) -> List[str]:
+    """HTML of every item description and content:encoded body in the fixtures"""
+    snippets = []
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, '*.xml'))):
+        for item in ET.parse(path).getroot().iter('item'):
+            for field in ('description', CONTENT_ENCODED):
+                text = item.findtext(field)
+                if text:
+                    snippets.append(text)
+    return snippets
+
+def per_snippet_us(func, snippets: List[str], repeat: int) -> float:
+    """Best-of-3 microseconds per snippet"""
+    runs = timeit.repeat(lambda: [func(snippet) for snippet in snippets], number=repeat, repeat=3)
+    return min(runs) / repeat / len(snippets) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HTML cleaning paths on feed snippets")
+    parser.add_argument('--repeat', type=int, default=200, help="Passes over the snippets per timing")
+    args = parser.parse_args()
+
+    from bs4 import BeautifulSoup
+    from utils import clean_html, strip_tags
+
+    def soup_text(snippet: str) -> str:
+        return BeautifulSoup(snippet, 'html.parser').get_text()
+
+    snippets = load_snippets()
+    fallbacks = sum(1 for snippet in snippets if strip_tags(snippet) is None)
+    # Same words as the BeautifulSoup text (whitespace aside)
+    matching = sum(1 for snippet in snippets if clean_html(snippet).split() == soup_text(snippet).split())
+
+    soup_us = per_snippet_us(soup_text, snippets, args.repeat)
+    clean_us = per_snippet_us(clean_html, snippets, args.repeat)
+    print(f"{len(snippets)} snippets, {sum(map(len, snippets)) / len(snippets):.0f} chars on average")
+    print(f"{'BeautifulSoup':<16}{soup_us:>10.1f} us/snippet")
+    print(f"{'clean_html':<16}{clean_us:>10.1f} us/snippet  ({soup_us / clean_us:.1f}x faster)")
+    print(f"{fallbacks} snippets fell back to BeautifulSoup; "
+          f"{matching}/{len(snippets)} give the same words as BeautifulSoup")
+
+if __name__ == "__main__":
+    main()
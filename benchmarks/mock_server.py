@@ -0,0 +1,386 @@
+"""Local stand-in for the RSS feeds, the OpenAI-compatible chat endpoint and Tavily.
+
+    GET  /feeds/<fixture>                   replay a recorded feed as-is
+    GET  /feeds/<fixture>?items=N&offset=K  N synthetic entries built from the fixture's items
+    POST /v1/chat/completions               canned analyses, streamed or not
+    POST /search                            Tavily-style search results
+
+Every endpoint can be slowed down and made to fail at a given rate:
+
+    python -m benchmarks.mock_server --port 8800 --llm-latency 0.8 --error-rate 0.05
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import socket
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlparse, parse_qs
+from xml.sax.saxutils import escape
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Categories the mock LLM assigns (config.CATEGORIES, repeated so the server has no project imports)
+CATEGORIES = [
+    'Climate Risk', 'InsureTech', 'Policies', 'Natural Disasters', 'Market Trends', 'Regulatory Changes'
+]
+
+# Words for the filler sentence that keeps synthetic entries from looking like duplicates
+VOCABULARY = (
+    'climate insurance insurer reinsurance underwriting catastrophe risk flood wildfire drought hurricane '
+    'storm heatwave coastal emissions disaster resilience adaptation regulation carbon liability premium '
+    'claims losses portfolio capital model exposure municipal agriculture infrastructure mortgage bond '
+    'parametric coverage deductible actuarial scenario disclosure investor lender utility grid supply '
+    'chain tenant homeowner farmer regulator supervisor county region river delta island valley harbor '
+    'forecast season record damage recovery rebuilding subsidy pricing demand market growth decline '
+    'survey report study analysis estimate warning outlook audit lawsuit settlement transition stranded'
+).split()
+
+SSE_CHUNK_CHARS = 24  # Characters of completion text per streamed chunk
+
+def load_fixture_items(path: str) -> List[Dict[str, str]]:
+    """Title, link, description, date and categories of each item in an RSS file"""
+    items = []
+    for item in ET.parse(path).getroot().iter('item'):
+        items.append({
+            'title': item.findtext('title', ''),
+            'link': item.findtext('link', ''),
+            'description': item.findtext('description', ''),
+            'pubDate': item.findtext('pubDate', ''),
+            'categories': [category.text or '' for category in item.findall('category')]
+        })
+    return items
+
+def synthetic_feed(name: str, items: List[Dict[str, str]], count: int, offset: int = 0) -> str:
+    """An RSS document of ``count`` distinct entries cycled from a fixture's items"""
+    now = time.time()
+    entries = []
+    for index in range(offset, offset + count):
+        item = items[index % len(items)]
+        rng = random.Random(f'{name}:{index}')
+        filler = ' '.join(rng.choice(VOCABULARY) for _ in range(40)).capitalize() + '.'
+        link = f"https://bench.example/{name}/{index}"
+        categories = ''.join(f'<category>{escape(category)}</category>' for category in item['categories'])
+        entries.append(
+            f'<item><title>{escape(item["title"])} ({index})</title><link>{link}</link>'
+            f'<guid isPermaLink="false">{link}</guid>'
+            f'<pubDate>{formatdate(now - index * 600, usegmt=True)}</pubDate>{categories}'
+            f'<description>{escape("<p>" + filler + "</p>" + item["description"])}</description></item>'
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f'<title>{escape(name)} (synthetic)</title><link>https://bench.example/{name}</link>'
+        f'<description>Benchmark feed</description>{"".join(entries)}</channel></rss>'
+    )
+
+def canned_analysis(text: str, rng: random.Random) -> Dict[str, Any]:
+    """A valid analysis whose category and tags depend on the article text"""
+    words = [word for word in re.findall(r'[a-z]{5,}', text.lower()) if word in VOCABULARY] or ['climate']
+    digest = int(hashlib.md5(text.encode('utf-8')).hexdigest(), 16)
+    return {
+        'category': CATEGORIES[digest % len(CATEGORIES)],
+        'key_insights': [f"Rising {words[0]} exposure", f"Shift in {words[-1]} pricing"],
+        'risks_opportunities': {
+            'risks': [f"Higher {words[len(words) // 2]} losses", "Coverage gaps"],
+            'opportunities': ["New parametric products", f"Better {words[0]} modelling"]
+        },
+        'relevance_score': rng.randint(4, 9)
+    }
+
+class MockState:
+    """Latency, error injection and request counters shared by the handler threads"""
+
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR, feed_latency: float = 0.05, llm_latency: float = 0.5,
+                 tavily_latency: float = 0.3, jitter: float = 0.5, error_rate: float = 0.0,
+                 malformed_rate: float = 0.0, retry_after: int = 1, seed: Optional[int] = None):
+        self.fixtures = {
+            os.path.splitext(name)[0]: os.path.join(fixtures_dir, name)
+            for name in sorted(os.listdir(fixtures_dir)) if name.endswith('.xml')
+        }
+        self.items = {name: load_fixture_items(path) for name, path in self.fixtures.items()}
+        self.latency = {'feed': feed_latency, 'llm': llm_latency, 'tavily': tavily_latency}
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters: Dict[str, int] = {}
+
+    def count(self, name: str):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def roll(self) -> float:
+        with self.lock:
+            return self.random.random()
+
+    def delay(self, endpoint: str):
+        mean = self.latency[endpoint]
+        if mean > 0:
+            with self.lock:
+                factor = self.random.uniform(1 - self.jitter, 1 + self.jitter)
+            time.sleep(mean * factor)
+
+    def injected_error(self) -> Optional[int]:
+        """A status to fail this request with, or None"""
+        if self.error_rate <= 0 or self.roll() >= self.error_rate:
+            return None
+        with self.lock:
+            return self.random.choice((429, 500, 503))
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'BenchMock/1.0'
+
+    @property
+    def state(self) -> MockState:
+        return self.server.state
+
+    def setup(self):
+        super().setup()
+        # Streamed chunks are small writes; don't let Nagle hold them back for a delayed ACK
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+        self.send_body(status, json.dumps(payload).encode('utf-8'), 'application/json', headers)
+
+    def fail(self, endpoint: str) -> bool:
+        """Answer with an injected error status; True if the request was failed"""
+        status = self.state.injected_error()
+        if status is None:
+            return False
+        self.state.count(f'{endpoint}_errors')
+        headers = {'Retry-After': str(self.state.retry_after)} if status == 429 else None
+        self.send_json(status, {'error': {'message': 'injected failure', 'code': status}}, headers)
+        return True
+
+    def read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        match = re.fullmatch(r'/feeds/([\w-]+?)(?:\.xml)?', url.path)
+        if not match or match.group(1) not in self.state.fixtures:
+            self.send_json(404, {'error': 'unknown feed'})
+            return
+        name = match.group(1)
+        self.state.count('feed_requests')
+        self.state.delay('feed')
+        if self.fail('feed'):
+            return
+
+        query = parse_qs(url.query)
+        if 'items' in query:
+            body = synthetic_feed(
+                name, self.state.items[name], int(query['items'][0]), int(query.get('offset', ['0'])[0])
+            ).encode('utf-8')
+        else:
+            with open(self.state.fixtures[name], 'rb') as handle:
+                body = handle.read()
+
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.state.count('feed_not_modified')
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_body(200, body, 'application/rss+xml; charset=utf-8', {'ETag': etag})
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        if path.endswith('/chat/completions'):
+            self.chat_completion(self.read_json())
+        elif path == '/search':
+            self.search(self.read_json())
+        else:
+            self.send_json(404, {'error': 'unknown endpoint'})
+
+    def chat_completion(self, request: Dict[str, Any]):
+        self.state.count('llm_requests')
+        self.state.delay('llm')
+        if self.fail('llm'):
+            return
+
+        prompt = request['messages'][-1]['content']
+        rng = random.Random(prompt)
+        ids = re.findall(r'\[id: (\d+)\]', prompt)
+        if ids:
+            blocks = re.split(r'\[id: \d+\]', prompt)[1:]
+            result: Any = {'articles': [dict(canned_analysis(block, rng), id=int(id_)) for id_, block in zip(ids, blocks)]}
+        else:
+            result = canned_analysis(prompt, rng)
+        content = json.dumps(result, indent=1)
+        if self.state.malformed_rate and self.state.roll() < self.state.malformed_rate:
+            # Chatter before the JSON, which the stream parser rejects on the first chunk
+            self.state.count('llm_malformed')
+            content = 'Sure! Here is the analysis you asked for:\n' + content
+
+        usage = {
+            'prompt_tokens': len(prompt) // 4,
+            'completion_tokens': len(content) // 4,
+            'total_tokens': (len(prompt) + len(content)) // 4
+        }
+        completion_id = f'chatcmpl-{rng.getrandbits(48):x}'
+        created = int(time.time())
+        if not request.get('stream'):
+            self.send_json(200, {
+                'id': completion_id, 'object': 'chat.completion', 'created': created, 'model': request.get('model'),
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+                'usage': usage
+            })
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def event(payload: Any):
+            data = f"data: {payload if isinstance(payload, str) else json.dumps(payload)}\n\n".encode('utf-8')
+            self.wfile.write(f'{len(data):x}\r\n'.encode('ascii') + data + b'\r\n')
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None, **extra):
+            return {
+                'id': completion_id, 'object': 'chat.completion.chunk', 'created': created,
+                'model': request.get('model'), 'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+                **extra
+            }
+
+        try:
+            event(chunk({'role': 'assistant', 'content': ''}))
+            for start in range(0, len(content), SSE_CHUNK_CHARS):
+                event(chunk({'content': content[start:start + SSE_CHUNK_CHARS]}))
+            event(chunk({}, 'stop'))
+            if (request.get('stream_options') or {}).get('include_usage'):
+                # Usage comes last, in a chunk without choices
+                event(dict(chunk({}), choices=[], usage=usage))
+            event('[DONE]')
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            # The client aborted malformed output
+            self.close_connection = True
+
+    def search(self, request: Dict[str, Any]):
+        self.state.count('tavily_requests')
+        self.state.delay('tavily')
+        if self.fail('tavily'):
+            return
+
+        rng = random.Random(request.get('query', ''))
+        domains = request.get('include_domains') or ['arxiv.org']
+        results = []
+        for index in range(int(request.get('max_results', 5))):
+            words = ' '.join(rng.choice(VOCABULARY) for _ in range(6))
+            results.append({
+                'title': f"{words.title()}: evidence from {rng.choice(VOCABULARY)} data",
+                'url': f"https://{domains[index % len(domains)]}/paper/{rng.getrandbits(40):x}",
+                'content': ' '.join(rng.choice(VOCABULARY) for _ in range(60)),
+                'score': round(rng.uniform(0.5, 0.99), 3)
+            })
+        self.send_json(200, {'query': request.get('query'), 'results': results, 'response_time': 0.1})
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients hang up mid-stream on purpose (early abort); anything else is still reported
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+class MockServer:
+    """The mock endpoints on a background thread; use as a context manager"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, **options):
+        self.state = MockState(**options)
+        self.httpd = _QuietServer((host, port), MockHandler)
+        self.httpd.state = self.state
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def feed_url(self, fixture: str, items: Optional[int] = None, offset: int = 0) -> str:
+        if items is None:
+            return f'{self.url}/feeds/{fixture}.xml'
+        return f'{self.url}/feeds/{fixture}.xml?items={items}&offset={offset}'
+
+    def start(self) -> 'MockServer':
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='mock-server', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> 'MockServer':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def add_server_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--feed-latency', type=float, default=0.05, help="Mean seconds per feed download")
+    parser.add_argument('--llm-latency', type=float, default=0.5, help="Mean seconds to the first LLM token")
+    parser.add_argument('--tavily-latency', type=float, default=0.3, help="Mean seconds per search")
+    parser.add_argument('--jitter', type=float, default=0.5, help="Latency varies by +/- this fraction")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests failed with 429/500/503")
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help="Share of LLM responses that are not clean JSON")
+    parser.add_argument('--retry-after', type=int, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument('--seed', type=int, default=None)
+
+def server_options(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        'feed_latency': args.feed_latency, 'llm_latency': args.llm_latency, 'tavily_latency': args.tavily_latency,
+        'jitter': args.jitter, 'error_rate': args.error_rate, 'malformed_rate': args.malformed_rate,
+        'retry_after': args.retry_after, 'seed': args.seed
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve mock feeds, LLM and Tavily endpoints")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8800)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockServer(args.host, args.port, **server_options(args))
+    print(f"Serving on {server.url}")
+    print(f"  CLIMATE_RISK_LLM_BASE_URL={server.url}/v1")
+    print(f"  CLIMATE_RISK_TAVILY_URL={server.url}/search")
+    for fixture in server.state.fixtures:
+        print(f"  feed: {server.feed_url(fixture)}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
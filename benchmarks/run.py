@@ -0,0 +1,299 @@
+"""Offline benchmarks against recorded feeds and a local mock LLM/Tavily server.
+
+    python -m benchmarks.run                                   # every scenario at 10, 100 and 1000 articles
+    python -m benchmarks.run --scales 10,10000 --scenarios pipeline
+    python -m benchmarks.run --llm-latency 1.0 --error-rate 0.05 --json results.json
+    python -m benchmarks.run record                            # refresh the fixtures from the live feeds
+
+Each scenario runs in a fresh interpreter with its own empty data directory,
+so caches from one run never speed up the next. Provider rate limits are
+lifted unless --real-rate-limits is given, so the numbers show the code's
+own throughput rather than the configured politeness.
+"""
+import argparse
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.mock_server import MockServer, FIXTURES_DIR, VOCABULARY, add_server_arguments, server_options
+
+SCENARIOS = ['fetch_news', 'analyze_article', 'fetch_research_papers', 'pipeline']
+DEFAULT_SCALES = [10, 100, 1000]
+API_KEY = 'benchmark-key'
+
+# Per-op latencies, number of items processed, number of failed ops
+Measurement = Tuple[List[float], int, int]
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+def timed_map(func: Callable, items: List[Any], workers: int) -> List[Tuple[float, Any]]:
+    """Run func over items on a thread pool, returning (seconds, result) per item"""
+    def call(item):
+        started = time.perf_counter()
+        result = func(item)
+        return time.perf_counter() - started, result
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bench') as pool:
+        return list(pool.map(call, items))
+
+def feed_sources(server_url: str, scale: int) -> List[Dict[str, Any]]:
+    """Enough synthetic feeds of MAX_RSS_ITEMS entries to add up to ``scale`` articles"""
+    from config import MAX_RSS_ITEMS
+    fixtures = sorted(os.path.splitext(name)[0] for name in os.listdir(FIXTURES_DIR) if name.endswith('.xml'))
+    sources = []
+    for index in range(math.ceil(scale / MAX_RSS_ITEMS)):
+        fixture = fixtures[index % len(fixtures)]
+        items = min(MAX_RSS_ITEMS, scale - index * MAX_RSS_ITEMS)
+        sources.append({
+            'name': f'{fixture} #{index}',
+            'rss_url': f'{server_url}/feeds/{fixture}.xml?items={items}&offset={index * MAX_RSS_ITEMS}',
+            'keywords': []
+        })
+    return sources
+
+def synthetic_articles(count: int) -> List[Dict[str, Any]]:
+    """Distinct articles shaped like fetch_news output"""
+    import random
+    articles = []
+    for index in range(count):
+        rng = random.Random(index)
+        words = [rng.choice(VOCABULARY) for _ in range(60)]
+        articles.append({
+            'title': ' '.join(words[:8]).capitalize(),
+            'summary': ' '.join(words[8:]).capitalize() + '.',
+            'url': f'https://bench.example/article/{index}',
+            'source_name': 'Benchmark',
+            'publish_date': '',
+            'content_hash': str(index)
+        })
+    return articles
+
+def bench_fetch_news(server_url: str, scale: int, workers: int) -> Measurement:
+    from utils import fetch_news
+    results = timed_map(fetch_news, feed_sources(server_url, scale), workers)
+    return [seconds for seconds, _ in results], sum(len(articles) for _, articles in results), \
+        sum(1 for _, articles in results if not articles)
+
+def bench_analyze_article(server_url: str, scale: int, workers: int) -> Measurement:
+    from utils import analyze_article
+    results = timed_map(lambda article: analyze_article(article, API_KEY), synthetic_articles(scale), workers)
+    return [seconds for seconds, _ in results], scale, sum(1 for _, result in results if result is None)
+
+def bench_fetch_research_papers(server_url: str, scale: int, workers: int) -> Measurement:
+    from config import CATEGORIES
+    from utils import fetch_research_papers
+    # Distinct topics, so every lookup reaches the server instead of the memo
+    topics = [f"{CATEGORIES[index % len(CATEGORIES)]} {index}" for index in range(scale)]
+    results = timed_map(lambda topic: fetch_research_papers(topic, api_key=API_KEY), topics, workers)
+    return [seconds for seconds, _ in results], scale, sum(1 for _, papers in results if not papers)
+
+def bench_pipeline(server_url: str, scale: int, workers: int) -> Measurement:
+    """The app's fetch flow: run_pipeline over the feeds, then warm research for every category.
+
+    Latency is each article's completion time since the run started.
+    """
+    from config import CATEGORIES
+    from pipeline import run_pipeline
+    from utils import prefetch_research_papers
+    started = time.perf_counter()
+    latencies = []
+    failed = 0
+    for event in run_pipeline(feed_sources(server_url, scale), api_key=API_KEY, max_workers=workers, incremental=True):
+        if event['type'] == 'article':
+            latencies.append(time.perf_counter() - started)
+            if event['result'] is None:
+                failed += 1
+        elif event['type'] == 'error':
+            failed += 1
+    prefetch_research_papers(CATEGORIES, api_key=API_KEY)
+    return latencies, len(latencies), failed
+
+DRIVERS: Dict[str, Callable[[str, int, int], Measurement]] = {
+    'fetch_news': bench_fetch_news,
+    'analyze_article': bench_analyze_article,
+    'fetch_research_papers': bench_fetch_research_papers,
+    'pipeline': bench_pipeline
+}
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def run_scenario(name: str, scale: int, server_url: str, workers: int, trace_memory: bool,
+                 real_rate_limits: bool) -> Dict[str, Any]:
+    """Run one scenario in this process (expects a fresh data directory) and summarize it"""
+    import config
+    if not real_rate_limits:
+        for limits in config.RATE_LIMITS.values():
+            limits.update(rate=1000.0, burst=1000, max_rate=1000.0)
+    # Imports (project modules and the lazily imported dependencies) are not part of the measurement
+    import utils
+    from metrics import get_metrics
+    from startup import preload_dependencies
+    preload_dependencies(background=False)
+
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    latencies, items, failed = DRIVERS[name](server_url, scale, workers)
+    elapsed = time.perf_counter() - started
+    traced_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024) if trace_memory else None
+    if trace_memory:
+        tracemalloc.stop()
+
+    snapshot = get_metrics().snapshot()
+    stages = {
+        timing['labels']['stage']: {'count': timing['count'], 'avg': timing['avg']}
+        for timing in snapshot['timings']
+        if timing['name'] == 'stage_seconds' and set(timing['labels']) == {'stage'}
+    }
+    retries = sum(counter['value'] for counter in snapshot['counters'] if counter['name'] == 'retries_total')
+    return {
+        'scenario': name,
+        'scale': scale,
+        'ops': len(latencies),
+        'items': items,
+        'failed': failed,
+        'seconds': elapsed,
+        'throughput': items / elapsed if elapsed else None,
+        'p50': percentile(latencies, 50),
+        'p99': percentile(latencies, 99),
+        'peak_rss_mb': peak_rss_mb(),
+        'traced_peak_mb': traced_peak,
+        'retries': retries,
+        'stages': stages
+    }
+
+def run_isolated(name: str, scale: int, server_url: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """Run a scenario in a fresh interpreter with an empty data directory"""
+    with tempfile.TemporaryDirectory(prefix='climate-risk-bench-') as data_dir:
+        env = dict(
+            os.environ,
+            CLIMATE_RISK_DATA_DIR=data_dir,
+            CLIMATE_RISK_LLM_BASE_URL=f'{server_url}/v1',
+            CLIMATE_RISK_TAVILY_URL=f'{server_url}/search',
+            CLIMATE_RISK_LOG_LEVEL=args.log_level,
+            NO_PROXY='127.0.0.1,localhost'
+        )
+        command = [
+            sys.executable, '-m', 'benchmarks.run', 'scenario', '--scenario', name, '--scale', str(scale),
+            '--server', server_url, '--workers', str(args.workers)
+        ]
+        if args.tracemalloc:
+            command.append('--tracemalloc')
+        if args.real_rate_limits:
+            command.append('--real-rate-limits')
+        result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        return {'scenario': name, 'scale': scale, 'error': result.stderr.strip().splitlines()[-1:] or ['failed']}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def format_ms(seconds: Optional[float]) -> str:
+    return f"{seconds * 1000:.1f}" if seconds is not None else "-"
+
+def print_report(results: List[Dict[str, Any]]):
+    print(f"{'scenario':<24}{'scale':>7}{'ops':>7}{'failed':>8}{'p50 (ms)':>11}{'p99 (ms)':>11}"
+          f"{'items/s':>10}{'rss (MB)':>10}{'traced (MB)':>13}")
+    for result in results:
+        if 'error' in result:
+            print(f"{result['scenario']:<24}{result['scale']:>7}  error: {result['error'][0]}")
+            continue
+        traced = f"{result['traced_peak_mb']:.1f}" if result['traced_peak_mb'] is not None else "-"
+        rss = f"{result['peak_rss_mb']:.1f}" if result['peak_rss_mb'] is not None else "-"
+        print(
+            f"{result['scenario']:<24}{result['scale']:>7}{result['ops']:>7}{result['failed']:>8}"
+            f"{format_ms(result['p50']):>11}{format_ms(result['p99']):>11}"
+            f"{result['throughput'] or 0:>10.1f}{rss:>10}{traced:>13}"
+        )
+
+def record_fixtures(fixtures_dir: str = FIXTURES_DIR) -> Dict[str, int]:
+    """Download every configured feed into the fixtures directory; returns bytes written per file"""
+    import requests
+    from config import NEWS_SOURCES, FEED_USER_AGENT, FEED_REQUEST_TIMEOUT
+    written = {}
+    for source in NEWS_SOURCES:
+        name = re.sub(r'[^a-z0-9]+', '_', source['name'].lower()).strip('_')
+        try:
+            response = requests.get(source['rss_url'], headers={'User-Agent': FEED_USER_AGENT},
+                                    timeout=FEED_REQUEST_TIMEOUT)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"Could not record {source['name']}: {str(e)}")
+            continue
+        with open(os.path.join(fixtures_dir, f'{name}.xml'), 'wb') as handle:
+            handle.write(response.content)
+        written[name] = len(response.content)
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fetching and analysis against local fixtures")
+    parser.add_argument('command', nargs='?', default='suite', choices=['suite', 'record', 'scenario'])
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help="Comma-separated scenarios to run")
+    parser.add_argument('--scales', default=','.join(map(str, DEFAULT_SCALES)),
+                        help="Comma-separated article counts (10 to 10000)")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent calls in the single-function scenarios")
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help="Also trace Python allocations for peak memory (slows the run down)")
+    parser.add_argument('--real-rate-limits', action='store_true', help="Keep the configured provider rate limits")
+    parser.add_argument('--log-level', default='ERROR', help="Log level inside the scenarios")
+    parser.add_argument('--json', dest='json_path', help="Also write the results to this file")
+    # Used when the suite runs a scenario in a child process
+    parser.add_argument('--scenario', choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument('--scale', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--server', help=argparse.SUPPRESS)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        for name, size in record_fixtures().items():
+            print(f"{name}: {size / 1024:.1f} KB")
+        return
+
+    if args.command == 'scenario':
+        print(json.dumps(run_scenario(args.scenario, args.scale, args.server, args.workers,
+                                      args.tracemalloc, args.real_rate_limits)))
+        return
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    scales = [int(scale) for scale in args.scales.split(',')]
+
+    results = []
+    with MockServer(**server_options(args)) as server:
+        for name in scenarios:
+            for scale in scales:
+                results.append(run_isolated(name, scale, server.url, args))
+        requests_served = dict(server.state.counters)
+
+    print_report(results)
+    print(f"\nmock server: {', '.join(f'{key}={value}' for key, value in sorted(requests_served.items()))}")
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as handle:
+            json.dump({'results': results, 'server': requests_served, 'options': server_options(args)}, handle, indent=2)
+
+if __name__ == "__main__":
+    main()
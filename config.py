@@ -8,9 +8,9 @@ load_dotenv()
 
 # API Configuration
 if 'GEMINI_API_KEY' not in globals():
-    GEMINI_API_KEY = None
+    GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 if 'TAVILY_API_KEY' not in globals():
-    TAVILY_API_KEY = None
+    TAVILY_API_KEY = os.getenv('TAVILY_API_KEY')
 
 # News sources for climate risk and insurance
 NEWS_SOURCES = [
@@ -64,14 +64,145 @@ CATEGORIES = [
 ]
 
 # RSS Feed Configuration
-RSS_CACHE_TIMEOUT = 3600  # Cache RSS feeds for 1 hour
+RSS_CACHE_TIMEOUT = 3600  # Revalidate cached RSS feeds after 1 hour
 MAX_RSS_ITEMS = 10  # Maximum number of items to fetch per feed
+FEED_REQUEST_TIMEOUT = 15  # Seconds to wait for a feed download
+FEED_USER_AGENT = 'Mozilla/5.0 (compatible; ClimateRiskBot/1.0)'
 
-# Time intervals for news fetching (in minutes)
+# LLM configuration
+LLM_MODEL = "gemini-2.0-flash"
+# Any OpenAI-compatible endpoint (the offline benchmarks point this at a local mock server)
+LLM_BASE_URL = os.getenv('CLIMATE_RISK_LLM_BASE_URL', "https://generativelanguage.googleapis.com/v1beta/openai")
+LLM_TIMEOUT = 60  # Seconds per completion request
+LLM_MAX_RETRIES = 0  # Retries are handled by rate_limit.call_with_retry
+LLM_POOL_MAXSIZE = 10  # Keep-alive connections per LLM client
+ANALYSIS_PROMPT_VERSION = 1  # Bump when the analysis prompt changes to invalidate cached results
+LLM_STREAMING = True  # Stream completions and check the JSON structure as it arrives
+LLM_JSON_MODE = True  # Ask for JSON-mode output; dropped automatically if the endpoint rejects it
+LLM_OUTPUT_ATTEMPTS = 2  # Requests per analysis when the output is malformed
+LLM_MAX_OUTPUT_CHARS = 12000  # Abort responses that run on past this length
+
+# Tavily search endpoint
+TAVILY_SEARCH_URL = os.getenv('CLIMATE_RISK_TAVILY_URL', 'https://api.tavily.com/search')
+
+# Shared HTTP sessions for feeds, Tavily and article pages
+HTTP_POOL_CONNECTIONS = 20  # Hosts with a pool kept open
+HTTP_POOL_MAXSIZE = 10  # Keep-alive connections per host
+# Feed downloads retry themselves; Tavily and article pages are retried by rate_limit.call_with_retry
+HTTP_MAX_RETRIES = 2  # Retries per feed download (connection errors, timeouts, HTTP_RETRY_STATUSES)
+HTTP_BACKOFF_FACTOR = 0.5  # Retries wait 0.5s, 1s, 2s, ...
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Rate limits per provider and API key (requests per second, adapted to the observed error rate)
+RATE_LIMITS = {
+    'gemini': {'rate': 0.5, 'burst': 4, 'min_rate': 0.05, 'max_rate': 5.0},
+    'tavily': {'rate': 1.0, 'burst': 6, 'min_rate': 0.1, 'max_rate': 5.0},
+    'fulltext': {'rate': 1.0, 'burst': 2, 'min_rate': 0.1, 'max_rate': 2.0}  # Per article domain
+}
+RETRY_MAX_ATTEMPTS = 4  # Attempts per call, including the first
+RETRY_BASE_DELAY = 1.0  # Seconds; doubled per attempt with full jitter
+RETRY_MAX_DELAY = 60.0
+
+# Local storage for caches and persisted results
+DATA_DIR = os.getenv('CLIMATE_RISK_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+
+# Analysis cache configuration
+ANALYSIS_CACHE_PATH = os.path.join(DATA_DIR, 'analysis_cache.sqlite3')
+ANALYSIS_CACHE_TTL = 7 * 24 * 3600  # Keep cached analyses for a week
+ANALYSIS_CACHE_MAX_ENTRIES = 5000  # Oldest entries are evicted beyond this size
+ANALYSIS_CACHE_LRU_SIZE = 256  # In-process LRU in front of the disk cache (0 disables it)
+
+# Feed cache shared by all app and worker processes
+FEED_CACHE_PATH = os.path.join(DATA_DIR, 'feed_cache.sqlite3')
+
+# Incremental ingestion: processed entries and stored results
+SEEN_INDEX_PATH = os.path.join(DATA_DIR, 'seen_entries.sqlite3')
+ARTICLE_STORE_PATH = os.path.join(DATA_DIR, 'articles.sqlite3')
+ARTICLE_STORE_CHUNK_SIZE = 500  # Rows per chunk when streaming the archive
+
+# Near-duplicate story detection (MinHash signatures with LSH banding)
+DEDUP_ENABLED = True
+DEDUP_INDEX_PATH = os.path.join(DATA_DIR, 'dedup.sqlite3')
+DEDUP_NUM_PERM = 64  # Signature length
+DEDUP_BANDS = 16  # 16 bands of 4 rows: candidates from roughly 50% similarity
+DEDUP_THRESHOLD = 0.6  # Estimated Jaccard similarity to treat stories as duplicates
+DEDUP_RETENTION_DAYS = 30
+DEDUP_PRUNE_INTERVAL = 3600  # Seconds between prunes of signatures past the retention window
+
+# Local relevance pre-filter: entries scoring below the threshold skip the LLM
+RELEVANCE_PREFILTER_ENABLED = True
+RELEVANCE_THRESHOLD = 3.0  # Pre-score (0-10) needed to send an entry for analysis
+RELEVANCE_TERMS = [
+    'climate', 'insurance', 'insurer', 'reinsurance', 'underwriting', 'catastrophe',
+    'risk', 'flood', 'wildfire', 'drought', 'hurricane', 'storm', 'heatwave',
+    'sea level', 'emissions', 'disaster', 'resilience', 'adaptation', 'regulation',
+    'climate finance', 'esg', 'carbon', 'liability', 'insurtech'
+]
+RELEVANCE_MODEL_ENABLED = True  # Blend in a TF-IDF model trained on stored relevance scores
+RELEVANCE_MODEL_MIN_SAMPLES = 50  # Stored analyses needed before the model is used
+RELEVANCE_MODEL_RETRAIN_EVERY = 25  # New stored analyses between retrainings
+RELEVANCE_SHADOW_RATE = 0.05  # Share of filtered-out entries analyzed anyway to measure misses
+RELEVANCE_MISS_SCORE = 6  # LLM relevance score at which a filtered-out entry counts as missed
+
+# Optional full-text extraction before analysis (newspaper parse/NLP in worker processes)
+FULLTEXT_ENABLED = False
+FULLTEXT_CACHE_PATH = os.path.join(DATA_DIR, 'fulltext.sqlite3')
+FULLTEXT_CACHE_TTL = 7 * 24 * 3600
+FULLTEXT_PRUNE_INTERVAL = 3600  # Seconds between prunes of texts older than the TTL
+FULLTEXT_DOWNLOAD_WORKERS = 8  # Concurrent article downloads (politeness is per domain via RATE_LIMITS)
+FULLTEXT_PARSE_WORKERS = 2  # Processes for CPU-bound parsing and summarization
+FULLTEXT_REQUEST_TIMEOUT = 15
+FULLTEXT_TOKEN_BUDGET = 1500  # Approximate tokens of article text sent to the LLM
+
+# Logging and metrics
+LOG_LEVEL = os.getenv('CLIMATE_RISK_LOG_LEVEL', 'INFO')
+LOG_FORMAT = 'json'  # 'json' for one structured object per line, 'text' for plain messages
+METRICS_DUMP_PATH = os.path.join(DATA_DIR, 'metrics.prom')  # Prometheus text written after each refresh
+METRICS_PORT = int(os.getenv('CLIMATE_RISK_METRICS_PORT', '0')) or None  # Serve /metrics on this port when set
+
+# Articles whose analysis failed are retried on later refreshes
+RETRY_QUEUE_PATH = os.path.join(DATA_DIR, 'retry_queue.sqlite3')
+RETRY_QUEUE_MAX_ATTEMPTS = 5
+RETRY_QUEUE_DELAY = 300  # Seconds before the first retry, doubled per attempt
+
+# Archive analytics
+ANALYTICS_FREQ = 'W'  # Time bucket for trends (pandas period alias)
+RISK_TERMS = [
+    'flood', 'wildfire', 'drought', 'hurricane', 'storm', 'heat',
+    'sea level', 'litigation', 'regulation', 'underinsurance', 'default'
+]
+
+# Time intervals for news fetching (in minutes); sources may override with an 'interval' key
 UPDATE_INTERVAL = 60
 
+# Background scheduler (scheduler.py)
+SCHEDULER_JITTER = 0.1  # Spread each source's next run by +/-10% of its interval
+SCHEDULER_MAX_SLEEP = 60  # Seconds between schedule checks at most
+SCHEDULER_WORKERS = 1  # Worker processes sharing the due sources (scheduler.py --workers)
+SCHEDULER_CLAIM_BATCH = 20  # Due sources a worker claims per pipeline pass
+SCHEDULER_ERROR_DELAY = 30  # Seconds a worker waits after a failed pipeline pass before claiming again
+
+# Source registry: NEWS_SOURCES seeds it unless SOURCES_FILE (a JSON or YAML list of sources) is set.
+# Sources take 'name', 'rss_url' and optionally 'keywords', 'priority' (higher runs first),
+# 'interval' (minutes) and 'enabled'.
+SOURCES_FILE = os.getenv('CLIMATE_RISK_SOURCES_FILE')
+SOURCE_REGISTRY_PATH = os.path.join(DATA_DIR, 'sources.sqlite3')
+SOURCE_FAILURE_THRESHOLD = 3  # Consecutive failed fetches before a source is backed off
+SOURCE_BACKOFF_MAX = 24 * 3600  # Longest backoff in seconds (doubles per failure past the threshold)
+SOURCE_LEASE_SECONDS = 900  # A claimed source goes back to the queue if its worker doesn't report in time
+
+# Concurrency limits for the fetch-and-analyze pipeline
+FEED_FETCH_WORKERS = 5  # Feeds downloaded in parallel
+ANALYSIS_MAX_WORKERS = 4  # Concurrent analysis requests
+ANALYSIS_BATCH_SIZE = 5  # Articles packed into one analysis request (1 disables batching)
+
 # Maximum number of articles to process per source
 MAX_ARTICLES_PER_SOURCE = 5
 
 # Maximum number of research papers to fetch
-MAX_RESEARCH_PAPERS = 3 
\ No newline at end of file
+MAX_RESEARCH_PAPERS = 3
+
+# Research lookup caching
+RESEARCH_CACHE_TTL = 6 * 3600  # Reuse research results for 6 hours
+RESEARCH_FAILURE_TTL = 60  # Back off failed lookups for a minute instead of retrying every rerun
+RESEARCH_REQUEST_TIMEOUT = 10 
\ No newline at end of file
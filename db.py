@@ -0,0 +1,40 @@
+import os
+import sqlite3
+import threading
+from typing import List
+
+def connect(path: str) -> sqlite3.Connection:
+    """Open a SQLite database that can be shared across threads and processes"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    # WAL lets Streamlit workers and background jobs read while another process writes
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+class SQLiteStore:
+    """Base class for small SQLite-backed stores sharing one connection per process"""
+    
+    schema = ''
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.RLock()
+        self.conn = connect(path)
+        with self.lock, self.conn:
+            self.conn.executescript(self.schema)
+            self.migrate()
+    
+    def migrate(self):
+        """Bring tables created by older versions up to date (runs inside a transaction)"""
+    
+    def columns(self, table: str) -> List[str]:
+        return [row['name'] for row in self.conn.execute(f'PRAGMA table_info({table})')]
+    
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,157 @@
+import hashlib
+import random
+import re
+import threading
+import time
+from array import array
+from typing import List, Dict, Any, Optional, Set
+from config import (
+    DEDUP_INDEX_PATH, DEDUP_NUM_PERM, DEDUP_BANDS, DEDUP_THRESHOLD, DEDUP_RETENTION_DAYS,
+    DEDUP_PRUNE_INTERVAL
+)
+from db import SQLiteStore
+from metrics import register_collector
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(1)
+# Fixed permutations so signatures stay comparable across processes and runs
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(DEDUP_NUM_PERM)
+]
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """Word n-grams of normalized text (single words for very short text)"""
+    words = re.findall(r'[a-z0-9]+', text.lower())
+    if len(words) < size:
+        return set(words)
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def minhash(text: str) -> array:
+    """MinHash signature of a text's shingles"""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for shingle in shingles(text)
+    ]
+    if not hashes:
+        return array('I', [_MAX_HASH] * DEDUP_NUM_PERM)
+    return array('I', [
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    ])
+
+def similarity(first: array, second: array) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(x == y for x, y in zip(first, second)) / len(first)
+
+def band_keys(signature: array) -> List[int]:
+    """LSH bucket per band; near-duplicates share at least one with high probability"""
+    rows = len(signature) // DEDUP_BANDS
+    return [
+        int.from_bytes(
+            hashlib.blake2b(signature[band * rows:(band + 1) * rows].tobytes(), digest_size=8).digest(),
+            'big', signed=True
+        )
+        for band in range(DEDUP_BANDS)
+    ]
+
+def article_text(article: Dict[str, Any]) -> str:
+    return f"{article.get('title', '')} {article.get('summary', '')}"
+
+class DedupIndex(SQLiteStore):
+    """Persistent MinHash/LSH index clustering near-duplicate stories across feeds"""
+    
+    schema = '''
+        CREATE TABLE IF NOT EXISTS signatures (
+            url TEXT PRIMARY KEY,
+            cluster TEXT NOT NULL,
+            signature BLOB NOT NULL,
+            added_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS bands (
+            bucket INTEGER NOT NULL,
+            band INTEGER NOT NULL,
+            url TEXT NOT NULL,
+            PRIMARY KEY (bucket, band, url)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_bands_url ON bands(url);
+        CREATE INDEX IF NOT EXISTS idx_signatures_added ON signatures(added_at);
+    '''
+    
+    def assign(self, article: Dict[str, Any]) -> str:
+        """Add an article and return its cluster: the URL of the first article seen with this story"""
+        url = article['url']
+        signature = minhash(article_text(article))
+        keys = band_keys(signature)
+        
+        with self.lock, self.conn:
+            # Re-seen URL (possibly with edited text): index it afresh
+            self.conn.execute('DELETE FROM bands WHERE url = ?', (url,))
+            self.conn.execute('DELETE FROM signatures WHERE url = ?', (url,))
+            
+            candidates = {
+                row['url'] for band, bucket in enumerate(keys)
+                for row in self.conn.execute(
+                    'SELECT url FROM bands WHERE bucket = ? AND band = ?', (bucket, band)
+                )
+            }
+            
+            cluster = url
+            best = DEDUP_THRESHOLD
+            for candidate in candidates:
+                row = self.conn.execute(
+                    'SELECT cluster, signature FROM signatures WHERE url = ?', (candidate,)
+                ).fetchone()
+                if row is None:
+                    continue
+                score = similarity(signature, array('I', row['signature']))
+                if score >= best:
+                    cluster, best = row['cluster'], score
+            
+            self.conn.execute(
+                'INSERT INTO signatures (url, cluster, signature, added_at) VALUES (?, ?, ?, ?)',
+                (url, cluster, signature.tobytes(), time.time())
+            )
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO bands (bucket, band, url) VALUES (?, ?, ?)',
+                [(bucket, band, url) for band, bucket in enumerate(keys)]
+            )
+        return cluster
+    
+    def prune(self, max_age_days: float = DEDUP_RETENTION_DAYS) -> int:
+        """Forget signatures older than the retention window to keep the index compact"""
+        cutoff = time.time() - max_age_days * 86400
+        with self.lock, self.conn:
+            self.conn.execute(
+                'DELETE FROM bands WHERE url IN (SELECT url FROM signatures WHERE added_at < ?)', (cutoff,)
+            )
+            return self.conn.execute('DELETE FROM signatures WHERE added_at < ?', (cutoff,)).rowcount
+    
+    def size(self) -> int:
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM signatures').fetchone()[0]
+
+_index: Optional[DedupIndex] = None
+_index_lock = threading.Lock()
+_pruned_at = 0.0
+
+def get_dedup_index() -> DedupIndex:
+    """Return the process-wide near-duplicate index, pruned at most every DEDUP_PRUNE_INTERVAL seconds"""
+    global _index, _pruned_at
+    with _index_lock:
+        if _index is None:
+            _index = DedupIndex(DEDUP_INDEX_PATH)
+        # Long-running processes (the scheduler) fetch the index once per pipeline run
+        now = time.time()
+        if now - _pruned_at >= DEDUP_PRUNE_INTERVAL:
+            _index.prune()
+            _pruned_at = now
+        return _index
+
+def _collect():
+    if _index is None:
+        return
+    yield 'dedup_index_size', {}, _index.size()
+
+register_collector(_collect)
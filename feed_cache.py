@@ -0,0 +1,113 @@
+import json
+import threading
+import time
+from typing import List, Dict, Any, Optional
+from config import FEED_CACHE_PATH
+from db import SQLiteStore
+from metrics import register_collector
+
+class FeedCache(SQLiteStore):
+    """Feed entries and validators (ETag/Last-Modified) shared by every process on the host"""
+    
+    schema = '''
+        CREATE TABLE IF NOT EXISTS feeds (
+            rss_url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            entries TEXT NOT NULL,
+            body_bytes INTEGER NOT NULL DEFAULT 0,
+            fetched_at REAL NOT NULL,
+            checked_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS feed_stats (
+            rss_url TEXT PRIMARY KEY,
+            requests INTEGER NOT NULL DEFAULT 0,
+            not_modified INTEGER NOT NULL DEFAULT 0,
+            bytes_downloaded INTEGER NOT NULL DEFAULT 0,
+            bytes_saved INTEGER NOT NULL DEFAULT 0,
+            parses INTEGER NOT NULL DEFAULT 0,
+            parse_time REAL NOT NULL DEFAULT 0
+        );
+    '''
+    
+    def get(self, rss_url: str) -> Optional[Dict[str, Any]]:
+        """Return the cached feed with its decoded entries, or None"""
+        with self.lock:
+            row = self.conn.execute('SELECT * FROM feeds WHERE rss_url = ?', (rss_url,)).fetchone()
+        if row is None:
+            return None
+        cached = dict(row)
+        cached['entries'] = json.loads(cached['entries'])
+        return cached
+    
+    def store(self, rss_url: str, entries: List[Dict[str, Any]], etag: Optional[str],
+              last_modified: Optional[str], body_bytes: int):
+        """Replace the cached entries after a full download"""
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                '''INSERT OR REPLACE INTO feeds
+                   (rss_url, etag, last_modified, entries, body_bytes, fetched_at, checked_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                (rss_url, etag, last_modified, json.dumps(entries, default=str), body_bytes, now, now)
+            )
+    
+    def touch(self, rss_url: str):
+        """Mark a cached feed as revalidated"""
+        with self.lock, self.conn:
+            self.conn.execute('UPDATE feeds SET checked_at = ? WHERE rss_url = ?', (time.time(), rss_url))
+    
+    def record(self, rss_url: str, not_modified: bool, bytes_downloaded: int = 0,
+               bytes_saved: int = 0, parse_time: float = 0.0):
+        """Accumulate per-feed request statistics"""
+        with self.lock, self.conn:
+            self.conn.execute('INSERT OR IGNORE INTO feed_stats (rss_url) VALUES (?)', (rss_url,))
+            self.conn.execute(
+                '''UPDATE feed_stats SET
+                       requests = requests + 1,
+                       not_modified = not_modified + ?,
+                       bytes_downloaded = bytes_downloaded + ?,
+                       bytes_saved = bytes_saved + ?,
+                       parses = parses + ?,
+                       parse_time = parse_time + ?
+                   WHERE rss_url = ?''',
+                (int(not_modified), bytes_downloaded, bytes_saved, int(not not_modified), parse_time, rss_url)
+            )
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return bytes saved, 304 rate and parse time per feed"""
+        with self.lock:
+            rows = self.conn.execute('SELECT * FROM feed_stats ORDER BY rss_url').fetchall()
+        
+        stats = {}
+        for row in rows:
+            stats[row['rss_url']] = {
+                'requests': row['requests'],
+                'not_modified': row['not_modified'],
+                'not_modified_rate': row['not_modified'] / row['requests'] if row['requests'] else 0.0,
+                'bytes_downloaded': row['bytes_downloaded'],
+                'bytes_saved': row['bytes_saved'],
+                'parses': row['parses'],
+                'avg_parse_time': row['parse_time'] / row['parses'] if row['parses'] else 0.0
+            }
+        return stats
+
+_cache: Optional[FeedCache] = None
+_cache_lock = threading.Lock()
+
+def get_feed_cache() -> FeedCache:
+    """Return the process-wide feed cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FeedCache(FEED_CACHE_PATH)
+        return _cache
+
+def _collect():
+    if _cache is None:
+        return
+    for rss_url, stats in _cache.stats().items():
+        for name in ('requests', 'not_modified', 'bytes_downloaded', 'bytes_saved'):
+            yield f'feed_cache_{name}', {'feed': rss_url}, stats[name]
+
+register_collector(_collect)
@@ -0,0 +1,160 @@
+import multiprocessing
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Optional
+from config import (
+    FULLTEXT_CACHE_PATH, FULLTEXT_CACHE_TTL, FULLTEXT_PRUNE_INTERVAL, FULLTEXT_DOWNLOAD_WORKERS,
+    FULLTEXT_PARSE_WORKERS, FULLTEXT_TOKEN_BUDGET
+)
+from db import SQLiteStore
+from utils import download_article, parse_article_html
+from metrics import get_logger, fields, inc, span
+
+logger = get_logger('fulltext')
+
+# Rough size of a token in English text, for budgeting without a tokenizer
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def truncate(text: str, max_chars: int) -> str:
+    """Cut text to max_chars, preferring a sentence boundary, then a word boundary"""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    sentence_end = max(cut.rfind('. '), cut.rfind('.\n'))
+    if sentence_end > max_chars // 2:
+        return cut[:sentence_end + 1]
+    return cut.rsplit(' ', 1)[0] + '…'
+
+def fit_to_budget(extracted: Dict[str, Any], budget: int = FULLTEXT_TOKEN_BUDGET) -> str:
+    """Article text within the token budget: the full text if it fits, else its summary plus the opening"""
+    text = re.sub(r'\n{2,}', '\n', extracted['text']).strip()
+    if estimate_tokens(text) <= budget:
+        return text
+    max_chars = budget * CHARS_PER_TOKEN
+    summary = truncate(extracted.get('summary') or '', max_chars // 2)
+    opening = truncate(text, max_chars - len(summary))
+    return f"{summary}\n\n{opening}" if summary else opening
+
+class FullTextCache(SQLiteStore):
+    """Extracted article text keyed by URL and the feed entry's content hash"""
+
+    schema = '''
+        CREATE TABLE IF NOT EXISTS texts (
+            url TEXT PRIMARY KEY,
+            content_hash TEXT NOT NULL,
+            text TEXT NOT NULL,
+            summary TEXT NOT NULL,
+            extracted_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_texts_extracted_at ON texts(extracted_at);
+    '''
+
+    def get(self, url: str, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Cached extraction, unless the entry changed since it was extracted"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT text, summary FROM texts WHERE url = ? AND content_hash = ? AND extracted_at >= ?',
+                (url, content_hash, time.time() - FULLTEXT_CACHE_TTL)
+            ).fetchone()
+        return {'text': row['text'], 'summary': row['summary']} if row else None
+
+    def put(self, url: str, content_hash: str, extracted: Dict[str, Any]):
+        with self.lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO texts (url, content_hash, text, summary, extracted_at) VALUES (?, ?, ?, ?, ?)',
+                (url, content_hash, extracted['text'], extracted['summary'] or '', time.time())
+            )
+
+    def prune(self) -> int:
+        with self.lock, self.conn:
+            return self.conn.execute(
+                'DELETE FROM texts WHERE extracted_at < ?', (time.time() - FULLTEXT_CACHE_TTL,)
+            ).rowcount
+
+_cache: Optional[FullTextCache] = None
+_download_pool: Optional[ThreadPoolExecutor] = None
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+_pruned_at = 0.0
+
+def get_fulltext_cache() -> FullTextCache:
+    """Return the process-wide full-text cache, pruned at most every FULLTEXT_PRUNE_INTERVAL seconds"""
+    global _cache, _pruned_at
+    with _lock:
+        if _cache is None:
+            _cache = FullTextCache(FULLTEXT_CACHE_PATH)
+        # Long-running processes (the scheduler) keep extracting through the same cache
+        now = time.time()
+        if now - _pruned_at >= FULLTEXT_PRUNE_INTERVAL:
+            _cache.prune()
+            _pruned_at = now
+        return _cache
+
+def _pools():
+    global _download_pool, _parse_pool
+    with _lock:
+        if _download_pool is None:
+            _download_pool = ThreadPoolExecutor(max_workers=FULLTEXT_DOWNLOAD_WORKERS, thread_name_prefix='fulltext')
+            # Spawned workers don't inherit locks held by the app's threads
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=FULLTEXT_PARSE_WORKERS, mp_context=multiprocessing.get_context('spawn')
+            )
+        return _download_pool, _parse_pool
+
+def _parse(url: str, html: str, summarize_over: int) -> Dict[str, Any]:
+    global _parse_pool
+    _, parse_pool = _pools()
+    try:
+        return parse_pool.submit(parse_article_html, url, html, summarize_over).result()
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool for later articles and parse this one here
+        with _lock:
+            if _parse_pool is parse_pool:
+                _parse_pool = ProcessPoolExecutor(
+                    max_workers=FULLTEXT_PARSE_WORKERS, mp_context=multiprocessing.get_context('spawn')
+                )
+        return parse_article_html(url, html, summarize_over)
+
+def extract_text(article: Dict[str, Any], budget: int = FULLTEXT_TOKEN_BUDGET) -> Optional[Dict[str, Any]]:
+    """Download and parse an article's page, using the cache when the entry is unchanged"""
+    cache = get_fulltext_cache()
+    content_hash = article.get('content_hash', '')
+    cached = cache.get(article['url'], content_hash)
+    inc('fulltext_cache_total', result='hit' if cached else 'miss')
+    if cached:
+        return cached
+
+    try:
+        with span('fulltext_download'):
+            html = download_article(article['url'])
+        # Only texts over the budget need newspaper's summary
+        with span('fulltext_parse'):
+            extracted = _parse(article['url'], html, budget * CHARS_PER_TOKEN)
+    except Exception as e:
+        logger.warning("Error extracting full text", extra=fields(url=article['url'], error=str(e)))
+        return None
+
+    if not extracted['text']:
+        return None
+    cache.put(article['url'], content_hash, extracted)
+    return extracted
+
+def enrich_articles(articles: List[Dict[str, Any]], budget: int = FULLTEXT_TOKEN_BUDGET) -> List[Dict[str, Any]]:
+    """Replace each article's RSS summary with its full text, fitted to the token budget.
+
+    Pages are downloaded concurrently and parsed in worker processes. Articles
+    whose text could not be extracted keep their RSS summary.
+    """
+    download_pool, _ = _pools()
+    enriched = []
+    for article, extracted in zip(articles, download_pool.map(lambda a: extract_text(a, budget), articles)):
+        if extracted:
+            article = {**article, 'rss_summary': article['summary'], 'summary': fit_to_budget(extracted, budget)}
+        enriched.append(article)
+    return enriched
@@ -0,0 +1,128 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Any, TYPE_CHECKING
+from config import (
+    HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_MAX_RETRIES, HTTP_BACKOFF_FACTOR,
+    HTTP_RETRY_STATUSES, LLM_BASE_URL, LLM_TIMEOUT, LLM_MAX_RETRIES, LLM_POOL_MAXSIZE
+)
+from metrics import register_collector
+
+# requests, httpx and openai are imported when the first client is built
+if TYPE_CHECKING:
+    import httpx
+    import requests
+    from openai import OpenAI
+
+_lock = threading.Lock()
+_sessions: Dict[str, 'requests.Session'] = {}
+_llm_clients: Dict[str, 'OpenAI'] = {}
+
+# New connections and requests per host made through the LLM clients
+_llm_host_stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {'requests': 0, 'connections': 0})
+
+def _build_session(retry) -> 'requests.Session':
+    import requests
+    from requests.adapters import HTTPAdapter
+    
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def get_http_session() -> 'requests.Session':
+    """Return the shared keep-alive session for feed downloads, retrying failed GETs itself"""
+    with _lock:
+        if 'feeds' not in _sessions:
+            from urllib3.util.retry import Retry
+            
+            _sessions['feeds'] = _build_session(Retry(
+                total=HTTP_MAX_RETRIES,
+                backoff_factor=HTTP_BACKOFF_FACTOR,
+                status_forcelist=HTTP_RETRY_STATUSES,
+                respect_retry_after_header=True,
+                raise_on_status=False
+            ))
+        return _sessions['feeds']
+
+def get_api_session() -> 'requests.Session':
+    """Return the shared keep-alive session for calls wrapped in rate_limit.call_with_retry.
+
+    It never retries on its own, so call_with_retry is the only retry layer
+    (and non-idempotent POSTs are not repeated underneath it).
+    """
+    with _lock:
+        if 'api' not in _sessions:
+            _sessions['api'] = _build_session(0)
+        return _sessions['api']
+
+def _trace_llm_request(request: 'httpx.Request'):
+    host = request.url.host
+    
+    def trace(event: str, info: Dict[str, Any]):
+        if event == 'connection.connect_tcp.complete':
+            with _lock:
+                _llm_host_stats[host]['connections'] += 1
+    
+    with _lock:
+        _llm_host_stats[host]['requests'] += 1
+    request.extensions['trace'] = trace
+
+def get_llm_client(api_key: str) -> 'OpenAI':
+    """Return the LLM client for an API key, creating it once per key"""
+    with _lock:
+        client = _llm_clients.get(api_key)
+        if client is None:
+            import httpx
+            from openai import OpenAI
+            
+            http_client = httpx.Client(
+                limits=httpx.Limits(max_connections=LLM_POOL_MAXSIZE, max_keepalive_connections=LLM_POOL_MAXSIZE),
+                timeout=LLM_TIMEOUT,
+                event_hooks={'request': [_trace_llm_request]}
+            )
+            client = OpenAI(
+                api_key=api_key,
+                base_url=LLM_BASE_URL,
+                timeout=LLM_TIMEOUT,
+                max_retries=LLM_MAX_RETRIES,
+                http_client=http_client
+            )
+            _llm_clients[api_key] = client
+        return client
+
+def connection_stats() -> Dict[str, Dict[str, int]]:
+    """Requests, new connections and reused connections per host"""
+    stats: Dict[str, Dict[str, int]] = {}
+    
+    with _lock:
+        sessions = list(_sessions.values())
+        for host, counts in _llm_host_stats.items():
+            stats[host] = dict(counts)
+    
+    for session in sessions:
+        adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+        for adapter in adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                counts = stats.setdefault(pool.host, {'requests': 0, 'connections': 0})
+                counts['requests'] += pool.num_requests
+                counts['connections'] += pool.num_connections
+    
+    for counts in stats.values():
+        counts['reused'] = max(0, counts['requests'] - counts['connections'])
+    return stats
+
+def _collect():
+    for host, stats in connection_stats().items():
+        for name in ('requests', 'connections', 'reused'):
+            yield f'http_{name}', {'host': host}, stats[name]
+
+register_collector(_collect)
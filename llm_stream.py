@@ -0,0 +1,304 @@
+import json
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+from config import (
+    LLM_MODEL, LLM_STREAMING, LLM_JSON_MODE, LLM_OUTPUT_ATTEMPTS, LLM_MAX_OUTPUT_CHARS
+)
+from rate_limit import call_with_retry, classify_error
+from metrics import get_logger, inc, observe, span, register_collector
+
+logger = get_logger('llm_stream')
+
+# Characters a model may emit before the JSON starts (whitespace and a ```json fence)
+_PREAMBLE_CHARS = set(' \t\r\n`jsonJSON')
+_CLOSING = {'}': '{', ']': '['}
+
+class JSONStreamError(ValueError):
+    """Model output that cannot become the expected JSON"""
+
+class JSONStreamParser:
+    """Follow the structure of a JSON document as it streams in.
+
+    Fails as soon as the output goes wrong: text before the opening brace,
+    mismatched brackets or an expected top-level value of the wrong type.
+    ``value_types`` maps each expected top-level key to the characters its
+    value may start with; values of other keys are not checked.
+    """
+
+    def __init__(self, value_types: Optional[Dict[str, str]] = None, allow_array: bool = False,
+                 max_chars: int = LLM_MAX_OUTPUT_CHARS):
+        self.value_types = value_types
+        self.openers = '{[' if allow_array else '{'
+        self.max_chars = max_chars
+        self.chunks: List[str] = []
+        self.length = 0
+        self.start: Optional[int] = None
+        self.root: Optional[str] = None
+        self.end: Optional[int] = None
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escape = False
+        self.key_chars: Optional[List[str]] = None  # Characters of a top-level key being read
+        self.expect_key = False
+        self.pending_key: Optional[str] = None  # Top-level key whose value hasn't started
+        self.keys: List[str] = []
+
+    @property
+    def done(self) -> bool:
+        return self.end is not None
+
+    def feed(self, text: str) -> bool:
+        """Consume streamed text; returns True once the top-level value is complete"""
+        offset = self.length
+        self.chunks.append(text)
+        self.length += len(text)
+        if self.done:
+            return True
+        if self.length > self.max_chars:
+            raise JSONStreamError(f"Output exceeded {self.max_chars} characters")
+
+        for position, char in enumerate(text, offset):
+            if self.start is None:
+                if char in self.openers:
+                    self.start = position
+                    self.root = char
+                    self._open(char)
+                elif char not in _PREAMBLE_CHARS:
+                    raise JSONStreamError(f"Output does not start with JSON: {text[:40]!r}")
+                continue
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == '\\':
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.key_chars is not None:
+                        self._key(''.join(self.key_chars))
+                        self.key_chars = None
+                elif self.key_chars is not None:
+                    self.key_chars.append(char)
+                continue
+
+            if char in ' \t\r\n:':
+                continue
+            if char == ',':
+                if len(self.stack) == 1 and self.stack[0] == '{':
+                    self.expect_key = True
+                continue
+            if char in _CLOSING:
+                if not self.stack or self.stack.pop() != _CLOSING[char]:
+                    raise JSONStreamError(f"Unbalanced {char!r} at character {position}")
+                if not self.stack:
+                    self.end = position + 1
+                    missing = [key for key in self.value_types or () if key not in self.keys]
+                    if missing and self.root == '{':
+                        raise JSONStreamError(f"Missing keys: {', '.join(missing)}")
+                    return True
+                continue
+
+            if char == '"' and self.expect_key and len(self.stack) == 1:
+                self.in_string = True
+                self.key_chars = []
+                self.expect_key = False
+                continue
+
+            self._value_start(char)
+            if char == '"':
+                self.in_string = True
+            elif char in '{[':
+                self._open(char)
+        return False
+
+    def _open(self, char: str):
+        self.stack.append(char)
+        if len(self.stack) == 1 and char == '{':
+            self.expect_key = True
+
+    def _key(self, key: str):
+        self.keys.append(key)
+        # Extra fields are skipped like the rest of the object's contents; only expected ones are checked
+        if self.value_types is None or key in self.value_types:
+            self.pending_key = key
+
+    def _value_start(self, char: str):
+        if self.pending_key is None or len(self.stack) != 1:
+            return
+        if self.value_types is not None and char not in self.value_types[self.pending_key]:
+            raise JSONStreamError(f"Unexpected value for {self.pending_key!r} starting with {char!r}")
+        self.pending_key = None
+
+    def text(self) -> str:
+        return ''.join(self.chunks)
+
+    def result(self) -> Any:
+        """The parsed JSON value, ignoring any trailing code fence"""
+        if not self.done:
+            raise JSONStreamError(f"Output ended before the JSON was complete ({self.length} characters)")
+        try:
+            return json.loads(self.text()[self.start:self.end])
+        except json.JSONDecodeError as e:
+            raise JSONStreamError(f"Invalid JSON: {str(e)}")
+
+_stats = {
+    'requests': 0,
+    'aborted': 0,  # Attempts stopped early on malformed output
+    'retries': 0,
+    'failures': 0,  # Requests with no usable output after every attempt
+    'completion_tokens': 0,
+    'wasted_tokens': 0,  # Output tokens of attempts that were discarded
+    'first_token_time': 0.0,
+    'first_token_count': 0,
+    'result_time': 0.0,
+    'result_count': 0
+}
+_stats_lock = threading.Lock()
+_json_mode = LLM_JSON_MODE
+
+def _record(**values):
+    with _stats_lock:
+        for name, value in values.items():
+            _stats[name] += value
+
+def stream_stats() -> Dict[str, Any]:
+    """Time to first token/result, aborted attempts, wasted tokens and the parse failure rate"""
+    with _stats_lock:
+        stats = dict(_stats)
+    return {
+        'requests': stats['requests'],
+        'aborted': stats['aborted'],
+        'retries': stats['retries'],
+        'failures': stats['failures'],
+        'failure_rate': stats['failures'] / stats['requests'] if stats['requests'] else 0.0,
+        'completion_tokens': stats['completion_tokens'],
+        'wasted_tokens': stats['wasted_tokens'],
+        'avg_first_token': stats['first_token_time'] / stats['first_token_count'] if stats['first_token_count'] else None,
+        'avg_result': stats['result_time'] / stats['result_count'] if stats['result_count'] else None,
+        'json_mode': _json_mode
+    }
+
+def _output_tokens(usage, parser: JSONStreamParser) -> int:
+    # Aborted streams report no usage; estimate about four characters per token
+    if usage is not None and getattr(usage, 'completion_tokens', None) is not None:
+        return usage.completion_tokens
+    return parser.length // 4
+
+def _record_usage(usage):
+    # Token counts as reported by the endpoint (streams only carry them on some providers)
+    if usage is None:
+        return
+    for kind in ('prompt', 'completion'):
+        tokens = getattr(usage, f'{kind}_tokens', None)
+        if tokens:
+            inc('llm_tokens_total', tokens, kind=kind)
+
+def _complete(client, messages: List[Dict[str, str]], value_types: Optional[Dict[str, str]],
+              allow_array: bool, stream: bool, json_mode: bool) -> Tuple[Any, Optional[JSONStreamError]]:
+    """One completion request, fed into a fresh parser as it arrives.
+
+    Returns (result, None), or (None, error) for malformed output: the request
+    itself succeeded, so call_with_retry must not count or retry it.
+    """
+    parser = JSONStreamParser(value_types, allow_array)
+    request = {'model': LLM_MODEL, 'messages': messages}
+    if json_mode:
+        request['response_format'] = {'type': 'json_object'}
+    started = time.monotonic()
+    usage = None
+    streaming = False
+
+    with span('llm_request', mode='stream' if stream else 'complete'):
+        try:
+            if stream:
+                response = client.chat.completions.create(
+                    stream=True, stream_options={'include_usage': True}, **request
+                )
+                streaming = True
+                try:
+                    for chunk in response:
+                        usage = getattr(chunk, 'usage', None) or usage
+                        # Once the object is closed, only the final usage chunk is of interest
+                        if parser.done or not chunk.choices or not chunk.choices[0].delta.content:
+                            continue
+                        if not parser.length:
+                            first_token = time.monotonic() - started
+                            _record(first_token_time=first_token, first_token_count=1)
+                            observe('llm_first_token_seconds', first_token)
+                        parser.feed(chunk.choices[0].delta.content)
+                finally:
+                    response.close()
+                streaming = False
+            else:
+                response = client.chat.completions.create(**request)
+                usage = response.usage
+                parser.feed(response.choices[0].message.content or '')
+            result = parser.result()
+        except JSONStreamError as e:
+            # Raised mid-stream: the response is cut off instead of read to the end
+            _record(aborted=1 if streaming else 0, wasted_tokens=_output_tokens(usage, parser))
+            _record_usage(usage)
+            return None, e
+
+    _record(completion_tokens=_output_tokens(usage, parser),
+            result_time=time.monotonic() - started, result_count=1)
+    _record_usage(usage)
+    return result, None
+
+def _rejects_json_mode(error: Exception) -> bool:
+    """Whether an error is the endpoint refusing response_format, rather than any other bad request"""
+    if classify_error(error)[1] != 400:
+        return False
+    response = getattr(error, 'response', None)
+    detail = ' '.join(str(part) for part in (
+        error, getattr(error, 'body', None) or '', getattr(response, 'text', None) or ''
+    )).lower()
+    return any(marker in detail for marker in ('response_format', 'json_object', 'json mode'))
+
+def complete_json(client, messages: List[Dict[str, str]], value_types: Optional[Dict[str, str]] = None,
+                  allow_array: bool = False, stream: bool = LLM_STREAMING,
+                  attempts: int = LLM_OUTPUT_ATTEMPTS) -> Any:
+    """Request a JSON completion, retrying when the output is malformed.
+
+    Streamed output is checked while it arrives, so a response that goes
+    wrong is cut off and retried without waiting for the rest of it.
+    """
+    global _json_mode
+    _record(requests=1)
+    json_mode = _json_mode
+    error: Optional[Exception] = None
+    attempt = 0
+
+    while attempt < attempts:
+        try:
+            result, error = call_with_retry(
+                'gemini', client.api_key, _complete, client, messages, value_types, allow_array, stream, json_mode
+            )
+        except Exception as e:
+            # Endpoints without JSON mode reject the request outright; try once without it
+            if json_mode and _rejects_json_mode(e):
+                json_mode = False
+                continue
+            raise
+        if error is not None:
+            attempt += 1
+            if attempt < attempts:
+                _record(retries=1)
+            continue
+        
+        if json_mode != _json_mode:
+            logger.warning("JSON mode is not supported by the LLM endpoint; continuing without it")
+            _json_mode = json_mode
+        return result
+
+    _record(failures=1)
+    raise error
+
+def _collect():
+    stats = stream_stats()
+    for name in ('requests', 'aborted', 'retries', 'failures', 'wasted_tokens'):
+        yield f'llm_stream_{name}', {}, stats[name]
+    yield 'llm_json_mode', {}, float(stats['json_mode'])
+
+register_collector(_collect)
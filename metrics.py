@@ -0,0 +1,255 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator, Tuple
+from config import LOG_LEVEL, LOG_FORMAT, METRICS_DUMP_PATH, METRICS_PORT
+
+# Prefix for every exported metric name
+NAMESPACE = 'climate_risk'
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# A collector returns (metric name, labels, value) samples read from existing stats at export time
+Sample = Tuple[str, Dict[str, Any], float]
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and the record's fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+_logging_lock = threading.Lock()
+_logging_configured = False
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger for a module, writing structured lines to stderr unless the host app configured logging"""
+    global _logging_configured
+    with _logging_lock:
+        if not _logging_configured:
+            root = logging.getLogger(NAMESPACE)
+            root.setLevel(LOG_LEVEL)
+            handler = logging.StreamHandler(sys.stderr)
+            handler.setFormatter(
+                StructuredFormatter() if LOG_FORMAT == 'json'
+                else logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s')
+            )
+            root.addHandler(handler)
+            root.propagate = False
+            _logging_configured = True
+    return logging.getLogger(f'{NAMESPACE}.{name}')
+
+def fields(**values) -> Dict[str, Dict[str, Any]]:
+    """Structured fields for a log call: ``logger.warning(msg, extra=fields(source=...))``"""
+    return {'fields': values}
+
+def _key(name: str, labels: Dict[str, Any]) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = []
+    for label, value in labels:
+        value = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{label}="{value}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class MetricsRegistry:
+    """In-process counters and latency histograms, plus collectors over existing stats"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: Dict[Tuple, float] = defaultdict(float)
+        # Per series: count per bucket (plus +Inf), sum, count
+        self.histograms: Dict[Tuple, List[float]] = {}
+        self.collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        with self.lock:
+            self.counters[_key(name, labels)] += value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            series = self.histograms.get(key)
+            if series is None:
+                series = self.histograms[key] = [0.0] * (len(BUCKETS) + 3)
+            for index, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            else:
+                series[len(BUCKETS)] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def span(self, stage: str, **labels) -> Iterator[None]:
+        """Time a pipeline stage; failures are counted per stage and re-raised"""
+        started = time.perf_counter()
+        status = 'ok'
+        try:
+            yield
+        except Exception:
+            status = 'error'
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.observe('stage_seconds', elapsed, stage=stage, **labels)
+            if status == 'error':
+                self.inc('stage_errors_total', stage=stage, **labels)
+            _logger.debug('span', extra=fields(stage=stage, seconds=round(elapsed, 4), status=status, **labels))
+
+    def register_collector(self, collector: Callable[[], Iterable[Sample]]):
+        with self.lock:
+            self.collectors.append(collector)
+
+    def collect(self) -> List[Sample]:
+        """Gauge samples from every collector; a failing collector is skipped"""
+        with self.lock:
+            collectors = list(self.collectors)
+        samples = []
+        for collector in collectors:
+            try:
+                samples.extend(collector())
+            except Exception as e:
+                _logger.warning('Metrics collector failed', extra=fields(error=str(e)))
+        return samples
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters, stage timings and gauges as plain data (for the app's diagnostics panel)"""
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {key: list(series) for key, series in self.histograms.items()}
+        return {
+            'counters': [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(counters.items())
+            ],
+            'timings': [
+                {
+                    'name': name, 'labels': dict(labels), 'count': int(series[-1]),
+                    'total': series[-2], 'avg': series[-2] / series[-1] if series[-1] else 0.0
+                }
+                for (name, labels), series in sorted(histograms.items())
+            ],
+            'gauges': [
+                {'name': name, 'labels': labels, 'value': value}
+                for name, labels, value in self.collect()
+            ]
+        }
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {key: list(series) for key, series in self.histograms.items()}
+        lines = []
+
+        def header(name: str, kind: str, seen: set):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f'# TYPE {name} {kind}')
+
+        seen: set = set()
+        for (name, labels), value in sorted(counters.items()):
+            full_name = f'{NAMESPACE}_{name}'
+            header(full_name, 'counter', seen)
+            lines.append(f'{full_name}{_format_labels(labels)} {_number(value)}')
+
+        for (name, labels), series in sorted(histograms.items()):
+            full_name = f'{NAMESPACE}_{name}'
+            header(full_name, 'histogram', seen)
+            cumulative = 0.0
+            for bound, count in zip(BUCKETS + ('+Inf',), series):
+                cumulative += count
+                lines.append(f'{full_name}_bucket{_format_labels(labels + (("le", str(bound)),))} {_number(cumulative)}')
+            lines.append(f'{full_name}_sum{_format_labels(labels)} {_number(series[-2])}')
+            lines.append(f'{full_name}_count{_format_labels(labels)} {_number(series[-1])}')
+
+        for name, labels, value in sorted(self.collect(), key=lambda sample: (sample[0], sorted(sample[1].items()))):
+            full_name = f'{NAMESPACE}_{name}'
+            header(full_name, 'gauge', seen)
+            lines.append(f'{full_name}{_format_labels(_key(name, labels)[1])} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+_logger = get_logger('metrics')
+_registry = MetricsRegistry()
+
+def get_metrics() -> MetricsRegistry:
+    """Return the process-wide metrics registry"""
+    return _registry
+
+def inc(name: str, value: float = 1.0, **labels):
+    _registry.inc(name, value, **labels)
+
+def observe(name: str, value: float, **labels):
+    _registry.observe(name, value, **labels)
+
+def span(stage: str, **labels):
+    return _registry.span(stage, **labels)
+
+def register_collector(collector: Callable[[], Iterable[Sample]]):
+    _registry.register_collector(collector)
+
+def write_metrics(path: str = METRICS_DUMP_PATH):
+    """Dump the Prometheus text to a file (e.g. for node_exporter's textfile collector)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as handle:
+        handle.write(_registry.render_prometheus())
+    os.replace(temp_path, path)
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port: Optional[int] = METRICS_PORT):
+    """Serve /metrics on a background thread, once per process; does nothing without a port"""
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+            class MetricsHandler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split('?')[0] != '/metrics':
+                        self.send_error(404)
+                        return
+                    body = _registry.render_prometheus().encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    _logger.debug('metrics request', extra=fields(client=self.client_address[0]))
+
+            try:
+                _server = ThreadingHTTPServer(('0.0.0.0', port), MetricsHandler)
+            except OSError as e:
+                # Another process (e.g. a second Streamlit session host) already serves this port
+                _logger.warning('Metrics server not started', extra=fields(port=port, error=str(e)))
+                _server = False
+                return None
+            threading.Thread(target=_server.serve_forever, name='metrics', daemon=True).start()
+            _logger.info('Serving metrics', extra=fields(port=port))
+        return _server or None
@@ -0,0 +1,235 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Any, Optional, Iterator
+from config import (
+    FEED_FETCH_WORKERS, ANALYSIS_MAX_WORKERS, ANALYSIS_BATCH_SIZE, DEDUP_ENABLED, RELEVANCE_PREFILTER_ENABLED,
+    FULLTEXT_ENABLED
+)
+from utils import fetch_news, analyze_articles
+from seen_index import get_seen_index
+from article_store import get_article_store
+from retry_queue import get_retry_queue
+from dedup import get_dedup_index
+from relevance import get_relevance_scorer
+from fulltext import enrich_articles
+from source_registry import get_source_registry
+from metrics import get_logger, fields, inc, span
+
+logger = get_logger('pipeline')
+
+def attach_duplicate(result: Dict[str, Any], article: Dict[str, Any]) -> Dict[str, Any]:
+    """Record another source's copy of a story on the analysis of its first copy"""
+    reports = result.setdefault('also_reported_by', [])
+    if article['url'] != result['url'] and all(report['url'] != article['url'] for report in reports):
+        reports.append({'title': article['title'], 'url': article['url'], 'source': article['source_name']})
+    return result
+
+def fetch_source(source: Dict[str, Any], incremental: bool) -> List[Dict[str, Any]]:
+    """Fetch a feed's articles, recording the fetch's cost and outcome in the source registry"""
+    registry = get_source_registry()
+    started = time.perf_counter()
+    try:
+        articles = fetch_news(source, incremental, raise_errors=True)
+    except Exception as e:
+        registry.record_failure(source['rss_url'], str(e), time.perf_counter() - started, source.get('lease'))
+        raise
+    registry.record_success(source['rss_url'], time.perf_counter() - started, len(articles), source.get('lease'))
+    return articles
+
+def analyze_batch(articles: List[Dict[str, Any]], batch_size: int, api_key: Optional[str],
+                  fulltext: bool) -> List[Optional[Dict[str, Any]]]:
+    """Analyze a batch, first swapping RSS summaries for full article text if requested"""
+    if fulltext:
+        with span('fulltext_enrich'):
+            articles = enrich_articles(articles)
+    with span('analysis_batch'):
+        return analyze_articles(articles, batch_size, api_key)
+
+def run_pipeline(
+    sources: List[Dict[str, Any]],
+    api_key: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    feed_workers: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    incremental: bool = False,
+    dedup: bool = DEDUP_ENABLED,
+    prefilter: bool = RELEVANCE_PREFILTER_ENABLED,
+    fulltext: bool = FULLTEXT_ENABLED
+) -> Iterator[Dict[str, Any]]:
+    """Fetch feeds in parallel and analyze their articles concurrently.
+    
+    Yields event dicts as work finishes:
+    - ``{'type': 'feed', 'source', 'articles', 'skipped'}`` when a feed has been fetched
+    - ``{'type': 'article', 'article', 'result', 'completed', 'total'}`` per analyzed article
+      (``result`` is None when the analysis failed)
+    - ``{'type': 'error', 'source', 'message'}`` when a feed could not be processed
+    
+    ``total`` grows as feeds arrive, so progress is tracked per article.
+    Articles are analyzed ``batch_size`` at a time with ``analyze_articles``.
+    
+    Successful results are merged into the article store and their entries
+    marked as seen; with ``incremental`` only new or changed entries are processed.
+    Failed articles go to the retry queue and are re-submitted once due.
+    Each feed fetch is recorded in the source registry (cost, health, next due time).
+    
+    With ``dedup``, near-duplicate copies of a story are not analyzed: they are
+    attached to the first copy's result (``also_reported_by``) and reported with
+    a ``duplicate_of`` key on their article event.
+    
+    With ``prefilter``, entries are pre-scored locally first: those below the
+    relevance threshold get no LLM call (``skipped``) but are not marked seen,
+    so later refreshes score them again; the rest are analyzed highest score first.
+    
+    With ``fulltext``, articles are analyzed from their extracted page text
+    (see fulltext.py) instead of the RSS summary; this runs only for articles
+    that passed the pre-filter and are not duplicates.
+    """
+    max_workers = max_workers or ANALYSIS_MAX_WORKERS
+    batch_size = batch_size or ANALYSIS_BATCH_SIZE
+    feed_workers = feed_workers or FEED_FETCH_WORKERS
+    seen = get_seen_index()
+    store = get_article_store()
+    retry_queue = get_retry_queue()
+    dedup_index = get_dedup_index() if dedup else None
+    scorer = get_relevance_scorer() if prefilter else None
+    if scorer:
+        scorer.sync(store)
+    completed = 0
+    total = 0
+    
+    # Earlier failures for these feeds that are due for another attempt
+    rss_urls = {source['rss_url'] for source in sources}
+    retries = [article for article in retry_queue.due('analysis') if article.get('rss_url') in rss_urls]
+    # Failed entries are not marked seen, so feeds return them again; the queue decides when they are retried
+    queued_urls = retry_queue.keys('analysis')
+    
+    # Story clusters being analyzed in this run, and copies waiting on them
+    in_flight = {article['url'] for article in retries}
+    waiting: Dict[str, List[Dict[str, Any]]] = {}
+    # Filtered-out entries analyzed anyway to measure the pre-filter's misses
+    shadow_urls = set()
+    
+    def mark_done(article: Dict[str, Any]):
+        seen.mark_seen(article['rss_url'], article['entry_key'], article['content_hash'], article['published_ts'])
+        retry_queue.remove('analysis', article['url'])
+    
+    def article_event(article: Dict[str, Any], result: Optional[Dict[str, Any]], **extra) -> Dict[str, Any]:
+        nonlocal completed
+        completed += 1
+        return {
+            'type': 'article',
+            'article': article,
+            'result': result,
+            'completed': completed,
+            'total': total,
+            **extra
+        }
+    
+    with ThreadPoolExecutor(max_workers=feed_workers, thread_name_prefix='feed') as feed_pool, \
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analyze') as analysis_pool:
+        
+        def submit(articles: List[Dict[str, Any]]):
+            for start in range(0, len(articles), batch_size):
+                batch = articles[start:start + batch_size]
+                pending[analysis_pool.submit(analyze_batch, batch, batch_size, api_key, fulltext)] = ('batch', batch)
+        
+        pending = {
+            feed_pool.submit(fetch_source, source, incremental): ('feed', source)
+            for source in sources
+        }
+        total += len(retries)
+        submit(retries)
+        
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, payload = pending.pop(future)
+                
+                if kind == 'feed':
+                    try:
+                        articles = future.result()
+                    except Exception as e:
+                        yield {
+                            'type': 'error',
+                            'source': payload['name'],
+                            'message': f"Error processing {payload['name']}: {str(e)}"
+                        }
+                        continue
+                    
+                    articles = [article for article in articles if article['url'] not in queued_urls]
+                    skipped = []
+                    if scorer:
+                        selected, shadow, skipped = scorer.select(articles)
+                        shadow_urls.update(article['url'] for article in shadow)
+                        articles = selected + shadow
+                        # Skipped entries are not marked seen: they are re-scored (cheaply) on the next
+                        # refresh, so a better filter or model can still let them through
+                        if skipped:
+                            inc('articles_dropped_total', len(skipped), reason='prefilter', source=payload['name'])
+                    total += len(articles)
+                    
+                    to_analyze = []
+                    duplicates = []
+                    for article in articles:
+                        cluster = dedup_index.assign(article) if dedup_index else article['url']
+                        if cluster == article['url']:
+                            in_flight.add(cluster)
+                            to_analyze.append(article)
+                        elif cluster in in_flight:
+                            waiting.setdefault(cluster, []).append(article)
+                        else:
+                            # First copy was analyzed on an earlier run; analyze this one if it wasn't stored
+                            canonical = store.get(cluster)
+                            if canonical:
+                                duplicates.append((article, canonical))
+                            else:
+                                to_analyze.append(article)
+                    
+                    submit(to_analyze)
+                    yield {'type': 'feed', 'source': payload['name'], 'articles': len(articles), 'skipped': len(skipped)}
+                    
+                    if duplicates:
+                        inc('articles_dropped_total', len(duplicates), reason='duplicate', source=payload['name'])
+                    for article, canonical in duplicates:
+                        store.upsert([attach_duplicate(canonical, article)])
+                        mark_done(article)
+                        yield article_event(article, canonical, duplicate_of=canonical['url'])
+                else:
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        logger.warning("Error analyzing batch", extra=fields(articles=len(payload), error=str(e)))
+                        results = [None] * len(payload)
+                    
+                    retry_later = []
+                    copy_events = []
+                    for article, result in zip(payload, results):
+                        if article['url'] in shadow_urls:
+                            scorer.record_shadow(result)
+                        copies = waiting.pop(article['url'], [])
+                        # Later copies find the stored result, or are analyzed themselves if this failed
+                        in_flight.discard(article['url'])
+                        if result:
+                            inc('articles_analyzed_total', source=article['source_name'])
+                            if copies:
+                                inc('articles_dropped_total', len(copies), reason='duplicate', source=article['source_name'])
+                            for copy in copies:
+                                attach_duplicate(result, copy)
+                                mark_done(copy)
+                                copy_events.append((copy, result))
+                            mark_done(article)
+                        else:
+                            inc('articles_dropped_total', reason='analysis_failed', source=article['source_name'])
+                            if not retry_queue.push('analysis', article['url'], article, 'analysis failed'):
+                                # Given up: stop the feed from returning it until its content changes
+                                seen.mark_seen(article['rss_url'], article['entry_key'], article['content_hash'],
+                                               article['published_ts'])
+                            # Without the first copy's analysis, the other copies are analyzed themselves
+                            retry_later.extend(copies)
+                    store.upsert([result for result in results if result])
+                    submit(retry_later)
+                    
+                    for article, result in zip(payload, results):
+                        yield article_event(article, result)
+                    for copy, result in copy_events:
+                        yield article_event(copy, result, duplicate_of=result['url'])
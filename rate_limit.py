@@ -0,0 +1,190 @@
+import hashlib
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Callable, Tuple
+from config import RATE_LIMITS, RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY
+from metrics import inc, register_collector
+
+# Statuses worth retrying; anything else (400, 401, 404, ...) fails immediately
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+class RetryableHTTPError(Exception):
+    """A transient HTTP failure raised by callers that don't use an SDK"""
+    
+    def __init__(self, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def classify_error(error: Exception) -> Tuple[bool, Optional[int], Optional[float]]:
+    """Return (retryable, status_code, retry_after) for an exception from any provider"""
+    response = getattr(error, 'response', None)
+    status = getattr(error, 'status_code', None) or getattr(response, 'status_code', None)
+    retry_after = getattr(error, 'retry_after', None)
+    if retry_after is None and response is not None and getattr(response, 'headers', None) is not None:
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+    
+    if status is not None:
+        return status in RETRYABLE_STATUSES, status, retry_after
+    
+    # No status: connection resets and timeouts (requests, httpx, openai) are transient
+    names = {cls.__name__ for cls in type(error).__mro__}
+    transient = isinstance(error, (ConnectionError, TimeoutError)) or any(
+        'Timeout' in name or 'Connection' in name for name in names
+    )
+    return transient, None, retry_after
+
+class AdaptiveRateLimiter:
+    """Token bucket whose refill rate follows the observed error rate (AIMD)"""
+    
+    def __init__(self, rate: float, burst: int, min_rate: float, max_rate: float,
+                 window: int = 50, error_threshold: float = 0.05):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.error_threshold = error_threshold
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.outcomes = deque(maxlen=window)
+        self.counters = {'requests': 0, 'throttled': 0, 'errors': 0, 'retries': 0}
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    self.counters['requests'] += 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+    
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+    
+    def on_success(self):
+        with self.lock:
+            self.outcomes.append(True)
+            # Additive increase while the provider is healthy
+            if self.error_rate() <= self.error_threshold:
+                self.rate = min(self.max_rate, self.rate + self.min_rate)
+    
+    def on_throttle(self, retry_after: Optional[float] = None):
+        with self.lock:
+            self.outcomes.append(False)
+            self.counters['throttled'] += 1
+            # Multiplicative decrease, and honor Retry-After for everyone sharing the key
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+            if retry_after:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+    
+    def on_error(self):
+        with self.lock:
+            self.outcomes.append(False)
+            self.counters['errors'] += 1
+            if self.error_rate() > self.error_threshold:
+                self.rate = max(self.min_rate, self.rate * 0.8)
+    
+    def on_retry(self):
+        with self.lock:
+            self.counters['retries'] += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {**self.counters, 'rate': self.rate, 'error_rate': self.error_rate()}
+
+_limiters: Dict[Tuple[str, str], AdaptiveRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+def _key_id(api_key: Optional[str]) -> str:
+    # Never keep raw keys around as dictionary keys or in stats output
+    return hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:8]
+
+def get_limiter(provider: str, api_key: Optional[str]) -> AdaptiveRateLimiter:
+    """Return the limiter for a provider and API key"""
+    key = (provider, _key_id(api_key))
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = AdaptiveRateLimiter(**RATE_LIMITS[provider])
+            _limiters[key] = limiter
+        return limiter
+
+def limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """Current rate and counters per provider/key"""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {f"{provider}:{key_id}": limiter.stats() for (provider, key_id), limiter in limiters.items()}
+
+def share_rate_limits(processes: int):
+    """Split each provider's limits between processes using the same API keys (call before any request)"""
+    if processes <= 1:
+        return
+    for limits in RATE_LIMITS.values():
+        for name in ('rate', 'min_rate', 'max_rate'):
+            limits[name] /= processes
+        limits['burst'] = max(1, limits['burst'] // processes)
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE_DELAY, cap: float = RETRY_MAX_DELAY) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def call_with_retry(provider: str, api_key: Optional[str], func: Callable, *args,
+                    max_attempts: int = RETRY_MAX_ATTEMPTS, **kwargs):
+    """Call func under the provider's rate limit, retrying transient failures"""
+    limiter = get_limiter(provider, api_key)
+    
+    for attempt in range(max_attempts):
+        limiter.acquire()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            retryable, status, retry_after = classify_error(e)
+            if status == 429:
+                limiter.on_throttle(retry_after)
+            elif retryable:
+                limiter.on_error()
+            
+            if not retryable or attempt == max_attempts - 1:
+                inc('calls_failed_total', provider=provider, status=status or 'none')
+                raise
+            
+            limiter.on_retry()
+            inc('retries_total', provider=provider, status=status or 'none')
+            time.sleep(min(RETRY_MAX_DELAY, retry_after) if retry_after else backoff_delay(attempt))
+            continue
+        
+        limiter.on_success()
+        return result
+
+def _collect():
+    for key, stats in limiter_stats().items():
+        provider = key.split(':', 1)[0]
+        for name in ('requests', 'throttled', 'errors', 'retries'):
+            yield f'limiter_{name}', {'provider': provider, 'key': key}, stats[name]
+        yield 'limiter_rate', {'provider': provider, 'key': key}, stats['rate']
+
+register_collector(_collect)
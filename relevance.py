@@ -0,0 +1,217 @@
+import math
+import random
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+from config import (
+    RELEVANCE_TERMS, RELEVANCE_THRESHOLD, RELEVANCE_MODEL_ENABLED, RELEVANCE_MODEL_MIN_SAMPLES,
+    RELEVANCE_MODEL_RETRAIN_EVERY, RELEVANCE_SHADOW_RATE, RELEVANCE_MISS_SCORE
+)
+from metrics import register_collector
+
+_WORD = re.compile(r'[a-z][a-z0-9]+')
+_STOPWORDS = frozenset(
+    'the and for with that this from are was were has have had its into over after about '
+    'more than their they will would could been not but new says said how what why who'.split()
+)
+
+def tokenize(text: str) -> List[str]:
+    return [word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS]
+
+def entry_text(article: Dict[str, Any]) -> str:
+    return f"{article.get('title', '')} {article.get('summary', '')}"
+
+class KeywordMatcher:
+    """Every keyword compiled into one case-insensitive regex.
+
+    Keywords match anywhere in a word, like a plain substring check, so
+    'insurance' also matches 'reinsurance' and 'microinsurance'. Longer
+    keywords are tried first.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = sorted({keyword.lower() for keyword in keywords if keyword}, key=len, reverse=True)
+        self.pattern = re.compile(
+            '|'.join(re.escape(keyword) for keyword in self.keywords), re.IGNORECASE
+        ) if self.keywords else None
+
+    def search(self, text: str) -> bool:
+        return bool(self.pattern and self.pattern.search(text))
+
+    def matches(self, text: str) -> set:
+        """Distinct keywords found in the text"""
+        if not self.pattern:
+            return set()
+        return {match.lower() for match in self.pattern.findall(text)}
+
+@lru_cache(maxsize=64)
+def keyword_matcher(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    """Compiled matcher for a keyword list, built once per distinct list"""
+    return KeywordMatcher(keywords)
+
+class RelevanceModel:
+    """TF-IDF weighted term scores learned from past LLM relevance scores.
+
+    Each term's score is the mean relevance of the articles containing it,
+    shrunk towards the overall mean for rare terms; a text scores the
+    TF-IDF weighted average of its known terms.
+    """
+
+    def __init__(self, prior_weight: float = 2.0):
+        self.prior_weight = prior_weight
+        self.idf: Dict[str, float] = {}
+        self.term_scores: Dict[str, float] = {}
+        self.mean = 0.0
+        self.samples = 0
+
+    def fit(self, samples: Iterable[Tuple[str, float]]) -> 'RelevanceModel':
+        doc_freq: Counter = Counter()
+        score_sums: Counter = Counter()
+        total = 0.0
+        count = 0
+        for text, score in samples:
+            terms = set(tokenize(text))
+            doc_freq.update(terms)
+            for term in terms:
+                score_sums[term] += score
+            total += score
+            count += 1
+
+        self.samples = count
+        self.mean = total / count if count else 0.0
+        self.idf = {term: math.log((1 + count) / (1 + df)) + 1 for term, df in doc_freq.items()}
+        self.term_scores = {
+            term: (score_sums[term] + self.prior_weight * self.mean) / (df + self.prior_weight)
+            for term, df in doc_freq.items()
+        }
+        return self
+
+    def predict(self, text: str) -> Optional[float]:
+        """Predicted relevance (0-10), or None when no term of the text was seen in training"""
+        weighted = 0.0
+        weights = 0.0
+        for term, tf in Counter(tokenize(text)).items():
+            if term in self.term_scores:
+                weight = tf * self.idf[term]
+                weighted += weight * self.term_scores[term]
+                weights += weight
+        return weighted / weights if weights else None
+
+class RelevanceScorer:
+    """Cheap local pre-score deciding which entries are worth an LLM call.
+
+    Entries are scored from domain keyword hits, blended with a RelevanceModel
+    once enough analyses are stored. A small random share of filtered-out
+    entries is analyzed anyway ("shadow" samples) to estimate how many
+    relevant articles the filter misses.
+    """
+
+    def __init__(self, terms: List[str] = RELEVANCE_TERMS, threshold: float = RELEVANCE_THRESHOLD,
+                 shadow_rate: float = RELEVANCE_SHADOW_RATE, use_model: bool = RELEVANCE_MODEL_ENABLED):
+        self.matcher = KeywordMatcher(terms)
+        self.threshold = threshold
+        self.shadow_rate = shadow_rate
+        self.use_model = use_model
+        self.model: Optional[RelevanceModel] = None
+        self.trained_count = 0  # Stored analyses when the model was last trained
+        self.lock = threading.Lock()
+        self.random = random.Random()
+        self.scored = 0
+        self.filtered = 0
+        self.shadowed = 0
+        self.shadow_relevant = 0
+
+    def sync(self, store):
+        """Retrain the model once RELEVANCE_MODEL_RETRAIN_EVERY analyses were stored since the last training"""
+        if not self.use_model:
+            return
+        count = store.count()
+        if count < RELEVANCE_MODEL_MIN_SAMPLES:
+            return
+        if self.model is not None and count - self.trained_count < RELEVANCE_MODEL_RETRAIN_EVERY:
+            return
+
+        # Trained on the same title and feed summary that score() sees
+        model = RelevanceModel().fit(
+            (entry_text(record), record['analysis']['relevance_score'])
+            for record in store.iter_articles()
+        )
+        with self.lock:
+            self.model = model
+            self.trained_count = count
+
+    def score(self, article: Dict[str, Any]) -> float:
+        """Pre-score on the LLM's 0-10 relevance scale"""
+        text = entry_text(article)
+        # Each distinct domain term halves the remaining distance to 10
+        keyword_score = 10 * (1 - 0.5 ** len(self.matcher.matches(text)))
+        prediction = self.model.predict(text) if self.model else None
+        return keyword_score if prediction is None else (keyword_score + prediction) / 2
+
+    def select(self, articles: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Split articles into (to analyze, shadow samples, filtered out).
+
+        Articles to analyze come highest score first; each gets a
+        ``prefilter_score``.
+        """
+        selected = []
+        shadow = []
+        dropped = []
+        for article in articles:
+            article['prefilter_score'] = self.score(article)
+            if article['prefilter_score'] >= self.threshold:
+                selected.append(article)
+            elif self.random.random() < self.shadow_rate:
+                shadow.append(article)
+            else:
+                dropped.append(article)
+
+        with self.lock:
+            self.scored += len(articles)
+            self.filtered += len(shadow) + len(dropped)
+            self.shadowed += len(shadow)
+        selected.sort(key=lambda article: article['prefilter_score'], reverse=True)
+        return selected, shadow, dropped
+
+    def record_shadow(self, result: Optional[Dict[str, Any]]):
+        """Record the LLM verdict on a shadow sample"""
+        if result and result['analysis']['relevance_score'] >= RELEVANCE_MISS_SCORE:
+            with self.lock:
+                self.shadow_relevant += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Calls avoided and the estimated number of relevant articles filtered out"""
+        with self.lock:
+            miss_rate = self.shadow_relevant / self.shadowed if self.shadowed else None
+            return {
+                'scored': self.scored,
+                'filtered': self.filtered,
+                'calls_avoided': self.filtered - self.shadowed,
+                'shadowed': self.shadowed,
+                'shadow_relevant': self.shadow_relevant,
+                'miss_rate': miss_rate,
+                'estimated_missed': miss_rate * self.filtered if miss_rate is not None else None,
+                'model_samples': self.model.samples if self.model else 0
+            }
+
+_scorer: Optional[RelevanceScorer] = None
+_scorer_lock = threading.Lock()
+
+def get_relevance_scorer() -> RelevanceScorer:
+    """Return the process-wide relevance scorer"""
+    global _scorer
+    with _scorer_lock:
+        if _scorer is None:
+            _scorer = RelevanceScorer()
+        return _scorer
+
+def _collect():
+    if _scorer is None:
+        return
+    stats = _scorer.stats()
+    for name in ('scored', 'filtered', 'calls_avoided', 'shadowed', 'shadow_relevant', 'model_samples'):
+        yield f'prefilter_{name}', {}, stats[name]
+
+register_collector(_collect)
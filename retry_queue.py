@@ -0,0 +1,102 @@
+import json
+import threading
+import time
+from typing import List, Dict, Any, Optional, Set
+from config import RETRY_QUEUE_PATH, RETRY_QUEUE_MAX_ATTEMPTS, RETRY_QUEUE_DELAY
+from db import SQLiteStore
+from metrics import get_logger, fields, inc, register_collector
+
+logger = get_logger('retry_queue')
+
+class RetryQueue(SQLiteStore):
+    """Failed work items kept for a later attempt, with growing delays between attempts"""
+    
+    schema = '''
+        CREATE TABLE IF NOT EXISTS retry_queue (
+            kind TEXT NOT NULL,
+            item_key TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            next_attempt_at REAL NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (kind, item_key)
+        );
+    '''
+    
+    def push(self, kind: str, item_key: str, payload: Dict[str, Any], error: str = '') -> bool:
+        """Queue an item, or reschedule it if already queued.
+
+        Returns False when the item was given up on (after RETRY_QUEUE_MAX_ATTEMPTS).
+        """
+        now = time.time()
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                'SELECT attempts FROM retry_queue WHERE kind = ? AND item_key = ?', (kind, item_key)
+            ).fetchone()
+            attempts = (row['attempts'] if row else 0) + 1
+            
+            if attempts > RETRY_QUEUE_MAX_ATTEMPTS:
+                self.conn.execute('DELETE FROM retry_queue WHERE kind = ? AND item_key = ?', (kind, item_key))
+                inc('retry_queue_given_up_total', kind=kind)
+                logger.warning(
+                    "Giving up on queued item", extra=fields(kind=kind, item=item_key, attempts=attempts - 1, error=error)
+                )
+                return False
+            
+            self.conn.execute(
+                '''INSERT OR REPLACE INTO retry_queue
+                   (kind, item_key, payload, attempts, last_error, next_attempt_at, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?, COALESCE(
+                       (SELECT created_at FROM retry_queue WHERE kind = ? AND item_key = ?), ?))''',
+                (
+                    kind, item_key, json.dumps(payload, default=str), attempts, error,
+                    now + RETRY_QUEUE_DELAY * 2 ** (attempts - 1), kind, item_key, now
+                )
+            )
+        return True
+    
+    def due(self, kind: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Payloads of items whose next attempt time has passed"""
+        with self.lock:
+            rows = self.conn.execute(
+                '''SELECT payload FROM retry_queue WHERE kind = ? AND next_attempt_at <= ?
+                   ORDER BY next_attempt_at LIMIT ?''',
+                (kind, time.time(), limit)
+            ).fetchall()
+        return [json.loads(row['payload']) for row in rows]
+    
+    def keys(self, kind: str) -> Set[str]:
+        """Keys of every queued item, due or not"""
+        with self.lock:
+            rows = self.conn.execute('SELECT item_key FROM retry_queue WHERE kind = ?', (kind,)).fetchall()
+        return {row['item_key'] for row in rows}
+    
+    def remove(self, kind: str, item_key: str):
+        """Drop an item after it succeeded"""
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM retry_queue WHERE kind = ? AND item_key = ?', (kind, item_key))
+    
+    def size(self, kind: Optional[str] = None) -> int:
+        with self.lock:
+            if kind is None:
+                return self.conn.execute('SELECT COUNT(*) FROM retry_queue').fetchone()[0]
+            return self.conn.execute('SELECT COUNT(*) FROM retry_queue WHERE kind = ?', (kind,)).fetchone()[0]
+
+_queue: Optional[RetryQueue] = None
+_queue_lock = threading.Lock()
+
+def get_retry_queue() -> RetryQueue:
+    """Return the process-wide retry queue"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = RetryQueue(RETRY_QUEUE_PATH)
+        return _queue
+
+def _collect():
+    if _queue is None:
+        return
+    yield 'retry_queue_size', {}, _queue.size()
+
+register_collector(_collect)
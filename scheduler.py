@@ -0,0 +1,159 @@
+"""Headless refresh scheduler.
+
+Runs the fetch-and-analyze pipeline on a schedule and writes results to the
+shared article store, which the Streamlit app only reads. Sources come from
+the source registry (source_registry.py); several worker processes share its
+due sources through leases:
+
+    python scheduler.py                # run forever
+    python scheduler.py --once         # refresh every source once and exit
+    python scheduler.py --workers 4    # shard sources across four worker processes
+    python scheduler.py --status       # per-source health, fetch cost and freshness lag
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import time
+from typing import List, Dict, Any, Optional
+from config import (
+    GEMINI_API_KEY, SCHEDULER_MAX_SLEEP, SCHEDULER_WORKERS, SCHEDULER_CLAIM_BATCH, SCHEDULER_ERROR_DELAY,
+    METRICS_PORT, METRICS_DUMP_PATH
+)
+from pipeline import run_pipeline
+from rate_limit import share_rate_limits
+from source_registry import SourceRegistry, get_source_registry
+from metrics import get_logger, fields, span, write_metrics, start_metrics_server
+
+logger = get_logger('scheduler')
+
+def refresh(sources: List[Dict[str, Any]], api_key: Optional[str]) -> Dict[str, int]:
+    """Run one incremental pipeline pass over sources"""
+    analyzed = 0
+    failed = 0
+    for event in run_pipeline(sources, api_key=api_key, incremental=True):
+        if event['type'] == 'error':
+            failed += 1
+            logger.warning(event['message'], extra=fields(source=event.get('source')))
+        elif event['type'] == 'article':
+            if event['result']:
+                analyzed += 1
+            else:
+                failed += 1
+    return {'analyzed': analyzed, 'failed': failed}
+
+def run(registry: SourceRegistry, api_key: Optional[str], once: bool = False, names: Optional[List[str]] = None,
+        worker: str = 'scheduler', metrics_path: str = METRICS_DUMP_PATH):
+    """Claim and refresh due sources until interrupted (with once, until every source was refreshed)"""
+    pass_started = time.time()
+
+    while True:
+        due = registry.claim(worker, SCHEDULER_CLAIM_BATCH, names=names,
+                             attempted_before=pass_started if once else None)
+
+        if due:
+            started = time.perf_counter()
+            try:
+                with span('refresh'):
+                    stats = refresh(due, api_key)
+            except (KeyboardInterrupt, SystemExit):
+                # Let another worker pick these up instead of waiting for the lease to expire
+                registry.release([source['rss_url'] for source in due])
+                raise
+            except Exception:
+                # One bad pass must not take the worker down; hand the sources back and try again later
+                logger.exception("Refresh failed", extra=fields(
+                    worker=worker, sources=[source['name'] for source in due]
+                ))
+                registry.release([source['rss_url'] for source in due])
+                time.sleep(SCHEDULER_ERROR_DELAY)
+                continue
+            logger.info("Refreshed sources", extra=fields(
+                worker=worker, sources=[source['name'] for source in due], analyzed=stats['analyzed'],
+                failed=stats['failed'], seconds=round(time.perf_counter() - started, 1)
+            ))
+            # Dump after every pass so a textfile collector always sees fresh numbers
+            write_metrics(metrics_path)
+            continue
+
+        if once:
+            return
+        next_due = registry.next_due_at(names) or time.time() + SCHEDULER_MAX_SLEEP
+        time.sleep(max(0.0, min(next_due - time.time(), SCHEDULER_MAX_SLEEP)))
+
+def run_worker(index: int, workers: int, api_key: str, once: bool, names: Optional[List[str]]):
+    """Entry point of one scheduler worker process"""
+    # Workers share the API keys, so each gets its share of the provider rate limits
+    share_rate_limits(workers)
+    start_metrics_server(METRICS_PORT + index if METRICS_PORT else None)
+    base, extension = os.path.splitext(METRICS_DUMP_PATH)
+    metrics_path = METRICS_DUMP_PATH if workers == 1 else f'{base}.worker{index}{extension}'
+    worker = f'{socket.gethostname()}:{os.getpid()}'
+
+    try:
+        run(get_source_registry(), api_key, once=once, names=names, worker=worker, metrics_path=metrics_path)
+    except KeyboardInterrupt:
+        pass
+
+def print_status(registry: SourceRegistry):
+    def age(seconds: Optional[float]) -> str:
+        if seconds is None:
+            return '-'
+        return f"{seconds / 3600:.1f}h" if abs(seconds) >= 3600 else f"{seconds / 60:.0f}m"
+
+    print(f"{'source':<32}{'health':<10}{'prio':>5}{'fetches':>9}{'avg fetch (s)':>15}{'freshness lag':>15}{'next due':>10}")
+    for source in registry.report():
+        avg = f"{source['avg_fetch_seconds']:.2f}" if source['avg_fetch_seconds'] is not None else '-'
+        print(
+            f"{source['name'][:31]:<32}{source['health']:<10}{source['priority']:>5}{source['fetches']:>9}"
+            f"{avg:>15}{age(source['freshness_lag']):>15}{age(source['next_due_in']):>10}"
+        )
+        if source['last_error'] and source['health'] != 'healthy':
+            print(f"    last error: {source['last_error']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh climate risk news in the background")
+    parser.add_argument('--once', action='store_true', help="Refresh every source once and exit")
+    parser.add_argument('--source', action='append', dest='sources', metavar='NAME',
+                        help="Only refresh the named source (repeatable)")
+    parser.add_argument('--workers', type=int, default=SCHEDULER_WORKERS,
+                        help="Worker processes sharing the due sources")
+    parser.add_argument('--status', action='store_true', help="Print per-source health and exit")
+    args = parser.parse_args()
+
+    registry = get_source_registry()
+    if args.status:
+        print_status(registry)
+        return
+
+    api_key = GEMINI_API_KEY
+    if not api_key:
+        parser.error("GEMINI_API_KEY must be set in the environment or .env file")
+
+    known = {source['name'] for source in registry.sources()}
+    if args.sources and not known.intersection(args.sources):
+        parser.error("No matching sources configured")
+
+    if args.workers <= 1:
+        run_worker(0, 1, api_key, args.once, args.sources)
+        return
+
+    # Spawned workers build their own connections and thread pools
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=run_worker, args=(index, args.workers, api_key, args.once, args.sources),
+                        name=f'scheduler-{index}')
+        for index in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Workers got the interrupt too; wait for them to hand back their leases
+        for process in processes:
+            process.join()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import calendar
+import hashlib
+import threading
+import time
+from typing import List, Dict, Any, Optional
+from config import SEEN_INDEX_PATH
+from db import SQLiteStore
+
+def entry_key(entry: Dict[str, Any]) -> str:
+    """Stable identity of a feed entry: its GUID, falling back to the link"""
+    return entry.get('id') or entry.get('guid') or entry.get('link') or entry.get('title', '')
+
+def content_hash(entry: Dict[str, Any]) -> str:
+    """Hash of the entry fields that feed into the analysis"""
+    payload = entry.get('title', '') + '\x1f' + entry.get('description', '')
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def entry_timestamp(entry: Dict[str, Any]) -> Optional[float]:
+    """Publish (or update) time of an entry as a UTC timestamp"""
+    parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+    if not parsed:
+        return None
+    try:
+        return float(calendar.timegm(tuple(parsed)[:6]))
+    except (TypeError, ValueError):
+        return None
+
+class SeenIndex(SQLiteStore):
+    """Entries already processed per feed, with a publish-time high-water mark"""
+    
+    schema = '''
+        CREATE TABLE IF NOT EXISTS seen_entries (
+            rss_url TEXT NOT NULL,
+            entry_key TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            published_ts REAL,
+            first_seen REAL NOT NULL,
+            last_seen REAL NOT NULL,
+            PRIMARY KEY (rss_url, entry_key)
+        );
+        CREATE TABLE IF NOT EXISTS feed_marks (
+            rss_url TEXT PRIMARY KEY,
+            high_water REAL NOT NULL,
+            updated_at REAL NOT NULL
+        );
+    '''
+    
+    def high_water_mark(self, rss_url: str) -> Optional[float]:
+        """Newest publish time processed for a feed"""
+        with self.lock:
+            row = self.conn.execute('SELECT high_water FROM feed_marks WHERE rss_url = ?', (rss_url,)).fetchone()
+        return row['high_water'] if row else None
+    
+    def unseen(self, rss_url: str, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return the entries that are new or whose content changed since they were processed"""
+        mark = self.high_water_mark(rss_url)
+        
+        # Anything published after the high-water mark is new without a lookup
+        candidates = []
+        fresh = set()
+        for idx, entry in enumerate(entries):
+            ts = entry_timestamp(entry)
+            if mark is not None and ts is not None and ts > mark:
+                fresh.add(idx)
+            else:
+                candidates.append(entry_key(entry))
+        
+        known = {}
+        if candidates:
+            placeholders = ','.join('?' * len(candidates))
+            with self.lock:
+                rows = self.conn.execute(
+                    f'SELECT entry_key, content_hash FROM seen_entries WHERE rss_url = ? AND entry_key IN ({placeholders})',
+                    [rss_url, *candidates]
+                ).fetchall()
+            known = {row['entry_key']: row['content_hash'] for row in rows}
+        
+        return [
+            entry for idx, entry in enumerate(entries)
+            if idx in fresh or known.get(entry_key(entry)) != content_hash(entry)
+        ]
+    
+    def mark_seen(self, rss_url: str, key: str, digest: str, published_ts: Optional[float] = None):
+        """Record an entry as processed and advance the feed's high-water mark"""
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                '''INSERT INTO seen_entries (rss_url, entry_key, content_hash, published_ts, first_seen, last_seen)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (rss_url, entry_key) DO UPDATE SET
+                       content_hash = excluded.content_hash,
+                       published_ts = excluded.published_ts,
+                       last_seen = excluded.last_seen''',
+                (rss_url, key, digest, published_ts, now, now)
+            )
+            if published_ts is not None:
+                self.conn.execute(
+                    '''INSERT INTO feed_marks (rss_url, high_water, updated_at) VALUES (?, ?, ?)
+                       ON CONFLICT (rss_url) DO UPDATE SET
+                           high_water = MAX(high_water, excluded.high_water),
+                           updated_at = excluded.updated_at''',
+                    (rss_url, published_ts, now)
+                )
+
+_index: Optional[SeenIndex] = None
+_index_lock = threading.Lock()
+
+def get_seen_index() -> SeenIndex:
+    """Return the process-wide seen-entry index"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SeenIndex(SEEN_INDEX_PATH)
+        return _index
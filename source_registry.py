@@ -0,0 +1,319 @@
+import json
+import random
+import threading
+import time
+import uuid
+from typing import List, Dict, Any, Optional, Iterable
+from config import (
+    NEWS_SOURCES, SOURCES_FILE, SOURCE_REGISTRY_PATH, SOURCE_FAILURE_THRESHOLD, SOURCE_BACKOFF_MAX,
+    SOURCE_LEASE_SECONDS, UPDATE_INTERVAL, SCHEDULER_JITTER
+)
+from db import SQLiteStore
+from seen_index import get_seen_index
+from metrics import get_logger, fields, inc, register_collector
+
+logger = get_logger('source_registry')
+
+def load_source_definitions(path: Optional[str] = SOURCES_FILE) -> List[Dict[str, Any]]:
+    """Sources from a JSON or YAML file (a list, or a mapping with a 'sources' list); NEWS_SOURCES without a file"""
+    if not path:
+        return NEWS_SOURCES
+    with open(path, encoding='utf-8') as handle:
+        if path.endswith(('.yaml', '.yml')):
+            import yaml
+            data = yaml.safe_load(handle)
+        else:
+            data = json.load(handle)
+    if isinstance(data, dict):
+        data = data.get('sources', [])
+    return data or []
+
+def normalize_source(source: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate a source definition and fill in defaults"""
+    if not source.get('name') or not source.get('rss_url'):
+        raise ValueError(f"Source definitions need a 'name' and an 'rss_url': {source!r}")
+    return {
+        'name': source['name'],
+        'rss_url': source['rss_url'],
+        'keywords': list(source.get('keywords') or []),
+        'priority': int(source.get('priority', 0)),
+        'interval': float(source['interval']) if source.get('interval') is not None else None,
+        'enabled': bool(source.get('enabled', True))
+    }
+
+def interval_seconds(interval: Optional[float]) -> float:
+    return (interval or UPDATE_INTERVAL) * 60
+
+def next_run_time(interval: Optional[float], now: float, jitter: float = SCHEDULER_JITTER) -> float:
+    """Schedule the next refresh, spread by +/- jitter so sources don't fire in lockstep"""
+    return now + interval_seconds(interval) * (1 + random.uniform(-jitter, jitter))
+
+class SourceRegistry(SQLiteStore):
+    """Feed definitions with their schedule, health and fetch cost, shared by every process on the host.
+
+    Scheduler workers claim due sources with a lease, so several processes
+    can work through one registry without fetching a feed twice. Sources that
+    fail SOURCE_FAILURE_THRESHOLD times in a row are backed off exponentially.
+    """
+
+    schema = '''
+        CREATE TABLE IF NOT EXISTS sources (
+            rss_url TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            keywords TEXT NOT NULL DEFAULT '[]',
+            priority INTEGER NOT NULL DEFAULT 0,
+            position INTEGER NOT NULL DEFAULT 0,
+            interval REAL,
+            enabled INTEGER NOT NULL DEFAULT 1,
+            seeded INTEGER NOT NULL DEFAULT 0,
+            next_due_at REAL NOT NULL DEFAULT 0,
+            lease_owner TEXT,
+            lease_until REAL,
+            consecutive_failures INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            last_attempt_at REAL,
+            last_success_at REAL,
+            fetches INTEGER NOT NULL DEFAULT 0,
+            failures INTEGER NOT NULL DEFAULT 0,
+            fetch_seconds REAL NOT NULL DEFAULT 0,
+            last_fetch_seconds REAL,
+            articles INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_sources_due ON sources(enabled, next_due_at);
+    '''
+
+    def migrate(self):
+        # Registries written before sources kept their seed order
+        if 'position' not in self.columns('sources'):
+            self.conn.execute('ALTER TABLE sources ADD COLUMN position INTEGER NOT NULL DEFAULT 0')
+
+    def _upsert(self, source: Dict[str, Any], seeded: bool, position: int, now: float):
+        # New sources start at a random point of their first interval so a large seed doesn't fire at once
+        first_due = now + random.uniform(0, SCHEDULER_JITTER * interval_seconds(source['interval']))
+        self.conn.execute(
+            '''INSERT INTO sources (rss_url, name, keywords, priority, position, interval, enabled, seeded, next_due_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (rss_url) DO UPDATE SET
+                   name = excluded.name,
+                   keywords = excluded.keywords,
+                   priority = excluded.priority,
+                   position = excluded.position,
+                   interval = excluded.interval,
+                   enabled = excluded.enabled,
+                   seeded = excluded.seeded''',
+            (
+                source['rss_url'], source['name'], json.dumps(source['keywords']), source['priority'], position,
+                source['interval'], int(source['enabled']), int(seeded), first_due
+            )
+        )
+
+    def sync(self, definitions: Iterable[Dict[str, Any]]) -> int:
+        """Load the seed definitions, keeping schedule and health; seeded sources no longer listed are disabled"""
+        sources = [normalize_source(source) for source in definitions]
+        now = time.time()
+        with self.lock, self.conn:
+            # Sources of equal priority keep the order of the seed definitions
+            for position, source in enumerate(sources):
+                self._upsert(source, seeded=True, position=position, now=now)
+            placeholders = ','.join('?' * len(sources))
+            self.conn.execute(
+                f'UPDATE sources SET enabled = 0 WHERE seeded = 1 AND rss_url NOT IN ({placeholders})',
+                [source['rss_url'] for source in sources]
+            )
+        return len(sources)
+
+    def add(self, source: Dict[str, Any]):
+        """Register a source directly in the database (kept when the seed file changes)"""
+        with self.lock, self.conn:
+            position = self.conn.execute('SELECT COALESCE(MAX(position) + 1, 0) FROM sources').fetchone()[0]
+            self._upsert(normalize_source(source), seeded=False, position=position, now=time.time())
+
+    @staticmethod
+    def _source(row) -> Dict[str, Any]:
+        source = {
+            'name': row['name'],
+            'rss_url': row['rss_url'],
+            'keywords': json.loads(row['keywords']),
+            'priority': row['priority']
+        }
+        if row['interval'] is not None:
+            source['interval'] = row['interval']
+        return source
+
+    def sources(self, enabled_only: bool = True) -> List[Dict[str, Any]]:
+        """Source definitions, highest priority first"""
+        with self.lock:
+            rows = self.conn.execute(
+                f'''SELECT * FROM sources {'WHERE enabled = 1' if enabled_only else ''}
+                    ORDER BY priority DESC, position, name'''
+            ).fetchall()
+        return [self._source(row) for row in rows]
+
+    def claim(self, owner: str, limit: int, names: Optional[List[str]] = None,
+              attempted_before: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Lease up to ``limit`` due sources to a worker, highest priority and most overdue first.
+
+        Each claimed source carries its lease token under ``'lease'``; pass it
+        back to record_success/record_failure so only the holder clears it.
+        With ``attempted_before``, sources not attempted since then are claimed
+        whether due or not (a one-off pass over everything).
+        """
+        now = time.time()
+        token = f'{owner}:{uuid.uuid4().hex[:8]}'
+        conditions = ['enabled = 1', '(lease_until IS NULL OR lease_until < ?)']
+        params: List[Any] = [now]
+        if attempted_before is None:
+            conditions.append('next_due_at <= ?')
+            params.append(now)
+        else:
+            conditions.append('(last_attempt_at IS NULL OR last_attempt_at < ?)')
+            params.append(attempted_before)
+        if names:
+            conditions.append(f"name IN ({','.join('?' * len(names))})")
+            params.extend(names)
+
+        # One UPDATE picks and leases the rows, so concurrent workers never claim the same source
+        with self.lock, self.conn:
+            self.conn.execute(
+                f'''UPDATE sources SET lease_owner = ?, lease_until = ?, last_attempt_at = ?
+                    WHERE rss_url IN (
+                        SELECT rss_url FROM sources WHERE {' AND '.join(conditions)}
+                        ORDER BY priority DESC, next_due_at LIMIT ?
+                    )''',
+                [token, now + SOURCE_LEASE_SECONDS, now, *params, limit]
+            )
+            rows = self.conn.execute(
+                'SELECT * FROM sources WHERE lease_owner = ? ORDER BY priority DESC, next_due_at', (token,)
+            ).fetchall()
+        return [dict(self._source(row), lease=token) for row in rows]
+
+    def release(self, rss_urls: List[str]):
+        """Give claimed sources back without recording a fetch (e.g. on shutdown)"""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                'UPDATE sources SET lease_owner = NULL, lease_until = NULL WHERE rss_url = ?',
+                [(rss_url,) for rss_url in rss_urls]
+            )
+
+    def record_success(self, rss_url: str, seconds: float, articles: int, lease: Optional[str] = None):
+        """Record a successful fetch and schedule the next one, releasing the source if ``lease`` still holds it"""
+        now = time.time()
+        with self.lock, self.conn:
+            row = self.conn.execute('SELECT interval FROM sources WHERE rss_url = ?', (rss_url,)).fetchone()
+            if row is None:
+                return
+            self.conn.execute(
+                '''UPDATE sources SET
+                       consecutive_failures = 0, last_error = NULL, last_success_at = ?, last_attempt_at = ?,
+                       fetches = fetches + 1, fetch_seconds = fetch_seconds + ?, last_fetch_seconds = ?,
+                       articles = articles + ?, next_due_at = ?,
+                       lease_owner = CASE WHEN lease_owner = ? THEN NULL ELSE lease_owner END,
+                       lease_until = CASE WHEN lease_owner = ? THEN NULL ELSE lease_until END
+                   WHERE rss_url = ?''',
+                (now, now, seconds, seconds, articles, next_run_time(row['interval'], now), lease, lease, rss_url)
+            )
+
+    def record_failure(self, rss_url: str, error: str, seconds: float, lease: Optional[str] = None):
+        """Record a failed fetch; past the failure threshold the next attempt is backed off"""
+        now = time.time()
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                'SELECT name, interval, consecutive_failures FROM sources WHERE rss_url = ?', (rss_url,)
+            ).fetchone()
+            if row is None:
+                return
+            failures = row['consecutive_failures'] + 1
+            if failures >= SOURCE_FAILURE_THRESHOLD:
+                delay = min(SOURCE_BACKOFF_MAX, interval_seconds(row['interval']) * 2 ** (failures - SOURCE_FAILURE_THRESHOLD + 1))
+                next_due = now + delay
+            else:
+                next_due = next_run_time(row['interval'], now)
+            self.conn.execute(
+                '''UPDATE sources SET
+                       consecutive_failures = ?, last_error = ?, last_attempt_at = ?,
+                       fetches = fetches + 1, failures = failures + 1, fetch_seconds = fetch_seconds + ?,
+                       last_fetch_seconds = ?, next_due_at = ?,
+                       lease_owner = CASE WHEN lease_owner = ? THEN NULL ELSE lease_owner END,
+                       lease_until = CASE WHEN lease_owner = ? THEN NULL ELSE lease_until END
+                   WHERE rss_url = ?''',
+                (failures, error, now, seconds, seconds, next_due, lease, lease, rss_url)
+            )
+        if failures >= SOURCE_FAILURE_THRESHOLD:
+            inc('source_backoffs_total', source=row['name'])
+            logger.warning("Backing off failing source", extra=fields(
+                source=row['name'], failures=failures, retry_in=round(next_due - now), error=error
+            ))
+
+    def next_due_at(self, names: Optional[List[str]] = None) -> Optional[float]:
+        """Earliest time an enabled source falls due"""
+        query = 'SELECT MIN(next_due_at) FROM sources WHERE enabled = 1'
+        if names:
+            query += f" AND name IN ({','.join('?' * len(names))})"
+        with self.lock:
+            return self.conn.execute(query, names or []).fetchone()[0]
+
+    @staticmethod
+    def health(row) -> str:
+        if not row['enabled']:
+            return 'disabled'
+        if row['consecutive_failures'] >= SOURCE_FAILURE_THRESHOLD:
+            return 'backoff'
+        if row['consecutive_failures']:
+            return 'failing'
+        return 'healthy' if row['fetches'] else 'new'
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Per-source health, fetch cost and freshness lag (age of the newest processed entry)"""
+        seen = get_seen_index()
+        now = time.time()
+        with self.lock:
+            rows = self.conn.execute('SELECT * FROM sources ORDER BY priority DESC, position, name').fetchall()
+        report = []
+        for row in rows:
+            high_water = seen.high_water_mark(row['rss_url'])
+            report.append({
+                'name': row['name'],
+                'rss_url': row['rss_url'],
+                'priority': row['priority'],
+                'health': self.health(row),
+                'consecutive_failures': row['consecutive_failures'],
+                'last_error': row['last_error'],
+                'fetches': row['fetches'],
+                'failures': row['failures'],
+                'avg_fetch_seconds': row['fetch_seconds'] / row['fetches'] if row['fetches'] else None,
+                'last_fetch_seconds': row['last_fetch_seconds'],
+                'articles': row['articles'],
+                'freshness_lag': now - high_water if high_water else None,
+                'since_success': now - row['last_success_at'] if row['last_success_at'] else None,
+                'next_due_in': row['next_due_at'] - now
+            })
+        return report
+
+_registry: Optional[SourceRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_source_registry() -> SourceRegistry:
+    """Return the process-wide source registry, synced with the seed definitions"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = SourceRegistry(SOURCE_REGISTRY_PATH)
+            _registry.sync(load_source_definitions())
+        return _registry
+
+def _collect():
+    if _registry is None:
+        return
+    health_counts: Dict[str, int] = {}
+    for source in _registry.report():
+        health_counts[source['health']] = health_counts.get(source['health'], 0) + 1
+        labels = {'source': source['name']}
+        yield 'source_consecutive_failures', labels, source['consecutive_failures']
+        if source['avg_fetch_seconds'] is not None:
+            yield 'source_fetch_seconds_avg', labels, source['avg_fetch_seconds']
+        if source['freshness_lag'] is not None:
+            yield 'source_freshness_lag_seconds', labels, source['freshness_lag']
+    for health, count in health_counts.items():
+        yield 'sources', {'health': health}, count
+
+register_collector(_collect)
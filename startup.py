@@ -0,0 +1,94 @@
+"""Startup helpers: pre-provision heavy dependencies and measure import cost.
+
+    python startup.py provision    # download NLTK data and warm heavy imports
+    python startup.py benchmark    # report cold import time per module
+"""
+import argparse
+import importlib
+import os
+import statistics
+import subprocess
+import sys
+import threading
+from typing import List, Dict, Optional
+from metrics import get_logger, fields
+
+logger = get_logger('startup')
+
+# Imported on the main fetch-and-analyze path
+MAIN_PATH_MODULES = ['requests', 'httpx', 'openai', 'feedparser', 'bs4']
+
+# Only needed for full-text extraction (fulltext.py, fetch_article_content)
+EXTRACTION_MODULES = ['nltk', 'newspaper']
+
+# Project modules, measured after their dependencies to show their own cost
+PROJECT_MODULES = ['config', 'utils', 'pipeline', 'scheduler', 'streamlit', 'app']
+
+def preload_dependencies(modules: Optional[List[str]] = None, background: bool = True) -> Optional[threading.Thread]:
+    """Import heavy modules ahead of first use, by default on a daemon thread"""
+    modules = modules or MAIN_PATH_MODULES
+    
+    def load():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except ImportError as e:
+                logger.warning("Could not preload module", extra=fields(module=name, error=str(e)))
+    
+    if not background:
+        load()
+        return None
+    thread = threading.Thread(target=load, name='preload-dependencies', daemon=True)
+    thread.start()
+    return thread
+
+def provision():
+    """Download NLTK data and import every heavy dependency once (also compiles bytecode)"""
+    from utils import initialize_nltk
+    initialize_nltk()
+    preload_dependencies(MAIN_PATH_MODULES + EXTRACTION_MODULES, background=False)
+    print("Dependencies provisioned")
+
+def measure_import(module: str, repeat: int = 3) -> Optional[float]:
+    """Median wall time to import a module in a fresh interpreter, in seconds"""
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - start)"
+    )
+    timings = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, '-c', code],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        if result.returncode != 0:
+            return None
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(timings)
+
+def benchmark(repeat: int = 3) -> Dict[str, Optional[float]]:
+    """Cold import time of each dependency and project module"""
+    results = {}
+    for module in MAIN_PATH_MODULES + EXTRACTION_MODULES + PROJECT_MODULES:
+        results[module] = measure_import(module, repeat)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Provision dependencies or benchmark startup")
+    parser.add_argument('command', choices=['provision', 'benchmark'])
+    parser.add_argument('--repeat', type=int, default=3, help="Interpreter launches per module (benchmark)")
+    args = parser.parse_args()
+    
+    if args.command == 'provision':
+        provision()
+        return
+    
+    print(f"{'module':<14}{'import (ms)':>12}")
+    for module, seconds in benchmark(args.repeat).items():
+        timing = f"{seconds * 1000:.1f}" if seconds is not None else "failed"
+        print(f"{module:<14}{timing:>12}")
+
+if __name__ == "__main__":
+    main()
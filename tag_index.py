@@ -0,0 +1,116 @@
+import threading
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Set, Iterable
+
+FACETS = ('tag', 'category', 'source')
+
+def normalize(value: str) -> str:
+    """Normalized form used for index keys"""
+    return value.strip().lower()
+
+def article_facets(article: Dict[str, Any]) -> Dict[str, Set[str]]:
+    """Normalized tag, category and source values of an analyzed article"""
+    return {
+        'tag': {normalize(tag) for tag in article.get('analysis', {}).get('key_insights', []) if tag},
+        'category': {normalize(article.get('category', ''))},
+        'source': {normalize(article.get('source', ''))}
+    }
+
+class TagIndex:
+    """Inverted index from normalized tag, category and source to article ids"""
+    
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, Set[str]]] = {facet: defaultdict(set) for facet in FACETS}
+        self.facets: Dict[str, Dict[str, Set[str]]] = {}
+        self.cursor = 0
+        self.lock = threading.RLock()
+    
+    def add(self, article_id: str, article: Dict[str, Any]):
+        """Index an article, replacing any earlier version of it"""
+        with self.lock:
+            self.remove(article_id)
+            facets = article_facets(article)
+            for facet, values in facets.items():
+                for value in values:
+                    self.postings[facet][value].add(article_id)
+            self.facets[article_id] = facets
+    
+    def remove(self, article_id: str):
+        with self.lock:
+            facets = self.facets.pop(article_id, None)
+            if not facets:
+                return
+            for facet, values in facets.items():
+                for value in values:
+                    ids = self.postings[facet].get(value)
+                    if ids is None:
+                        continue
+                    ids.discard(article_id)
+                    if not ids:
+                        del self.postings[facet][value]
+    
+    def _match(self, facet: str, values: Iterable[str], match_all: bool) -> Set[str]:
+        sets = [self.postings[facet].get(normalize(value), set()) for value in values]
+        if not sets:
+            return set(self.facets)
+        return set.intersection(*sets) if match_all else set().union(*sets)
+    
+    def query(self, tags: Optional[List[str]] = None, categories: Optional[List[str]] = None,
+              sources: Optional[List[str]] = None, match_all_tags: bool = False,
+              combine: str = 'and') -> Set[str]:
+        """Ids of articles matching the given facet values.
+
+        Values within a facet are OR'ed (tags can require all with match_all_tags);
+        facets are combined with 'and' or 'or'. Empty facets don't constrain the result.
+        """
+        with self.lock:
+            selected = [
+                self._match(facet, values, match_all_tags and facet == 'tag')
+                for facet, values in (('tag', tags), ('category', categories), ('source', sources))
+                if values
+            ]
+            if not selected:
+                return set(self.facets)
+            if combine == 'or':
+                return set().union(*selected)
+            return set.intersection(*selected)
+    
+    def values(self, facet: str) -> List[str]:
+        """Sorted normalized values of a facet"""
+        with self.lock:
+            return sorted(self.postings[facet])
+    
+    def counts(self, facet: str, within: Optional[Set[str]] = None) -> Dict[str, int]:
+        """Number of articles per facet value, optionally restricted to some ids"""
+        with self.lock:
+            if within is None:
+                return {value: len(ids) for value, ids in self.postings[facet].items()}
+            return {
+                value: len(ids & within)
+                for value, ids in self.postings[facet].items()
+                if not ids.isdisjoint(within)
+            }
+    
+    def sync(self, store) -> int:
+        """Index articles written to the store since the last sync; returns how many"""
+        with self.lock:
+            changed = 0
+            for article, cursor in store.iter_since(self.cursor):
+                self.add(article['url'], article)
+                self.cursor = cursor
+                changed += 1
+            return changed
+    
+    def __len__(self) -> int:
+        return len(self.facets)
+
+_index: Optional[TagIndex] = None
+_index_lock = threading.Lock()
+
+def get_tag_index() -> TagIndex:
+    """Return the process-wide tag index shared by all sessions"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = TagIndex()
+        return _index
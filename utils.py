@@ -1,135 +1,272 @@
-import requests
-from bs4 import BeautifulSoup
-from newspaper import Article
 from datetime import datetime
-import google.generativeai as genai
-import json
-import nltk
-import feedparser
+import html
+import re
+import sys
 import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 from config import (
-    GEMINI_API_KEY, TAVILY_API_KEY, CATEGORIES, RESEARCH_DOMAINS,
-    MAX_RESEARCH_PAPERS, MAX_RSS_ITEMS, RSS_CACHE_TIMEOUT
+    GEMINI_API_KEY, CATEGORIES, RESEARCH_DOMAINS,
+    MAX_RESEARCH_PAPERS, MAX_RSS_ITEMS, RSS_CACHE_TIMEOUT,
+    ANALYSIS_BATCH_SIZE, FEED_REQUEST_TIMEOUT, FEED_USER_AGENT,
+    RESEARCH_CACHE_TTL, RESEARCH_FAILURE_TTL, RESEARCH_REQUEST_TIMEOUT, FULLTEXT_REQUEST_TIMEOUT,
+    TAVILY_SEARCH_URL
 )
-from openai import OpenAI
-import streamlit as st
+from analysis_cache import get_analysis_cache, make_cache_key
+from feed_cache import get_feed_cache
+from seen_index import get_seen_index, entry_key, content_hash, entry_timestamp
+from http_client import get_http_session, get_api_session, get_llm_client
+from relevance import keyword_matcher
+from rate_limit import call_with_retry, RetryableHTTPError, RETRYABLE_STATUSES, parse_retry_after
+from llm_stream import complete_json, JSONStreamError
+from metrics import get_logger, fields, inc, observe, span
+
+# Heavy dependencies (feedparser, bs4, newspaper, nltk, streamlit) are imported
+# on first use; `python startup.py provision` loads them ahead of time.
+
+logger = get_logger('utils')
+
+# NLTK data needed by newspaper's Article.nlp(), with its location in nltk_data
+NLTK_PACKAGES = {
+    'punkt': 'tokenizers/punkt',
+    'averaged_perceptron_tagger': 'taggers/averaged_perceptron_tagger',
+    'wordnet': 'corpora/wordnet'
+}
+_nltk_ready = False
+_nltk_lock = threading.Lock()
 
 # Initialize NLTK
 def initialize_nltk():
-    """Initialize NLTK dependencies"""
-    required_packages = ['punkt', 'averaged_perceptron_tagger', 'wordnet']
-    for package in required_packages:
-        try:
-            nltk.data.find(f'tokenizers/{package}')
-        except LookupError:
-            nltk.download(package)
-
-initialize_nltk()
+    """Initialize NLTK dependencies, downloading missing data once per process"""
+    global _nltk_ready
+    with _nltk_lock:
+        if _nltk_ready:
+            return
+        import nltk
+        for package, resource in NLTK_PACKAGES.items():
+            try:
+                nltk.data.find(resource)
+            except LookupError:
+                nltk.download(package, quiet=True)
+        _nltk_ready = True
 
-# RSS feed cache
-rss_cache: Dict[str, Dict[str, Any]] = {}
+def get_session_state():
+    """Streamlit session state, or None when not running inside the app"""
+    # Only look at streamlit if the app already imported it; workers never pay for it
+    st = sys.modules.get('streamlit')
+    return st.session_state if st is not None else None
 
-def get_openai_client():
+def get_openai_client(api_key: Optional[str] = None):
     """Get OpenAI client with current API key"""
-    # Try getting key from session state first
-    if hasattr(st, 'session_state') and 'gemini_key' in st.session_state:
-        api_key = st.session_state.gemini_key
-    else:
-        # Fallback to config
-        from config import GEMINI_API_KEY
-        api_key = GEMINI_API_KEY
+    # An explicit key wins; worker threads have no session state to read from
+    if not api_key:
+        # Try getting key from session state first
+        session_state = get_session_state()
+        if session_state is not None and 'gemini_key' in session_state:
+            api_key = session_state.gemini_key
+        else:
+            # Fallback to config
+            from config import GEMINI_API_KEY
+            api_key = GEMINI_API_KEY
     
     if not api_key:
         return None
         
-    return OpenAI(
-        api_key=api_key,
-        base_url="https://generativelanguage.googleapis.com/v1beta/openai"
-    )
+    return get_llm_client(api_key)
 
-def clean_html(html_text: str) -> str:
-    """Clean HTML content from text"""
-    soup = BeautifulSoup(html_text, 'html.parser')
-    return soup.get_text(separator=' ', strip=True)
+def _filter_entries(source: Dict[str, Any], entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keep entries matching the source keywords, if any are specified"""
+    if not source['keywords']:
+        return entries
+    
+    matcher = keyword_matcher(tuple(source['keywords']))
+    return [entry for entry in entries if matcher.search(entry.title + ' ' + entry.get('description', ''))]
 
-def fetch_rss_feed(source: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Fetch and parse RSS feed with caching"""
-    cache_key = source['rss_url']
+def _select_entries(source: Dict[str, Any], entries: List[Dict[str, Any]], only_new: bool) -> List[Dict[str, Any]]:
+    """Drop already-processed entries (when requested), then apply keyword filtering"""
+    if only_new:
+        entries = get_seen_index().unseen(source['rss_url'], entries)
+    return _filter_entries(source, entries)
+
+def fetch_rss_feed(source: Dict[str, Any], only_new: bool = False, raise_errors: bool = False) -> List[Dict[str, Any]]:
+    """Fetch and parse RSS feed with caching and conditional requests.
+
+    With only_new, entries already processed with identical content are dropped
+    before any further work is done on them. Failures return no entries, or are
+    re-raised with raise_errors (so callers can track the feed's health).
+    """
+    import feedparser
+    cache = get_feed_cache()
+    rss_url = source['rss_url']
     current_time = time.time()
     
-    # Check cache
-    if cache_key in rss_cache:
-        cached_data = rss_cache[cache_key]
-        if current_time - cached_data['timestamp'] < RSS_CACHE_TIMEOUT:
-            return cached_data['entries']
-    
     try:
-        # Add allow_redirects=True to handle 301/303 redirects
-        feed = feedparser.parse(
-            source['rss_url'],
-            agent='Mozilla/5.0 (compatible; ClimateRiskBot/1.0)'
-        )
+        # Check cache; fresh entries are served without touching the network
+        cached = cache.get(rss_url)
+        if cached:
+            entries = [feedparser.FeedParserDict(entry) for entry in cached['entries']]
+            if current_time - cached['checked_at'] < RSS_CACHE_TIMEOUT:
+                inc('feed_requests_total', source=source['name'], result='cached')
+                return _select_entries(source, entries, only_new)
+        
+        headers = {'User-Agent': FEED_USER_AGENT}
+        if cached and cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached and cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+        
+        # Redirects (301/302/303) are followed automatically
+        with span('feed_download', source=source['name']):
+            response = get_http_session().get(rss_url, headers=headers, timeout=FEED_REQUEST_TIMEOUT)
         
-        # Check for successful response or redirect
-        if hasattr(feed, 'status'):
-            if feed.status not in [200, 301, 302, 303]:
-                raise Exception(f"Feed returned status code: {feed.status}")
+        # Unchanged feed: reuse the cached entries and skip parsing entirely
+        if response.status_code == 304 and cached:
+            cache.touch(rss_url)
+            cache.record(rss_url, not_modified=True, bytes_saved=cached['body_bytes'])
+            inc('feed_requests_total', source=source['name'], result='not_modified')
+            return _select_entries(source, entries, only_new)
+        
+        if response.status_code != 200:
+            raise Exception(f"Feed returned status code: {response.status_code}")
+        
+        parse_start = time.perf_counter()
+        with span('feed_parse', source=source['name']):
+            feed = feedparser.parse(response.content)
+        parse_time = time.perf_counter() - parse_start
+        inc('feed_requests_total', source=source['name'], result='downloaded')
         
         if not feed.entries:
             raise Exception("No entries found in feed")
             
         entries = feed.entries[:MAX_RSS_ITEMS]
         
-        # Filter entries if keywords are specified
-        if source['keywords']:
-            filtered_entries = []
-            for entry in entries:
-                text = (entry.title + ' ' + entry.get('description', '')).lower()
-                if any(keyword.lower() in text for keyword in source['keywords']):
-                    filtered_entries.append(entry)
-            entries = filtered_entries
-        
         # Cache the results
-        rss_cache[cache_key] = {
-            'timestamp': current_time,
-            'entries': entries
-        }
+        cache.store(
+            rss_url,
+            entries,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            body_bytes=len(response.content)
+        )
+        cache.record(rss_url, not_modified=False, bytes_downloaded=len(response.content), parse_time=parse_time)
         
-        return entries
+        return _select_entries(source, entries, only_new)
     except Exception as e:
-        print(f"Error fetching RSS feed from {source['name']}: {str(e)}")
+        inc('feed_errors_total', source=source['name'])
+        logger.warning("Error fetching RSS feed", extra=fields(source=source['name'], error=str(e)))
+        if raise_errors:
+            raise
         return []
 
+# Comments, script/style blocks, tags (attribute values may contain '>') and declarations
+_MARKUP = re.compile(
+    r'<!--.*?-->'
+    r'|<(script|style)\b[^>]*>.*?</\1\s*>'
+    r'|<(/?)([a-zA-Z][\w:-]*)(?:[^>"\']|"[^"]*"|\'[^\']*\')*>'
+    r'|<[!?][^>]*>',
+    re.DOTALL | re.IGNORECASE
+)
+# What is left of a tag the pattern could not match (unclosed, truncated, ...)
+_LEFTOVER_MARKUP = re.compile(r'<[a-zA-Z/!?]')
+# Tags that separate words; any other tag is removed without a space
+_BLOCK_TAGS = frozenset(
+    'address article aside blockquote br dd div dl dt figcaption figure footer h1 h2 h3 h4 h5 h6 '
+    'header hr li main nav ol p pre section table tbody td tfoot th thead tr ul'.split()
+)
+
+def _markup_replacement(match: 're.Match') -> str:
+    tag = match.group(3)
+    return ' ' if tag and tag.lower() in _BLOCK_TAGS else ''
+
+def strip_tags(html_text: str) -> Optional[str]:
+    """Text of an HTML snippet in one regex pass, or None if the markup is malformed"""
+    if '<' in html_text:
+        html_text = _MARKUP.sub(_markup_replacement, html_text)
+        if _LEFTOVER_MARKUP.search(html_text):
+            return None
+    if '&' in html_text:
+        html_text = html.unescape(html_text)
+    return ' '.join(html_text.split())
+
+def clean_html(html_text: str) -> str:
+    """Clean HTML content from text.
+
+    Feed snippets are stripped with a regex pass; BeautifulSoup only parses
+    markup that pass cannot handle.
+    """
+    text = strip_tags(html_text)
+    if text is not None:
+        return text
+    from bs4 import BeautifulSoup
+    inc('html_clean_fallback_total')
+    return ' '.join(BeautifulSoup(html_text, 'html.parser').get_text(separator=' ').split())
+
+def parse_article_html(url: str, html: str, summarize_over: Optional[int] = None) -> Dict[str, Any]:
+    """Parse downloaded article HTML with newspaper.
+
+    The costly NLP step (summary, keywords) only runs when the text is longer
+    than ``summarize_over`` characters, or always when it is None. Importable
+    at module level so it can run in a worker process.
+    """
+    from newspaper import Article
+    
+    article = Article(url)
+    article.download(input_html=html)
+    article.parse()
+    if summarize_over is None or len(article.text) > summarize_over:
+        try:
+            initialize_nltk()
+            article.nlp()
+        except Exception as e:
+            # The text is still usable without a summary
+            logger.warning("Error summarizing article content", extra=fields(url=url, error=str(e)))
+    
+    return {
+        'title': article.title,
+        'text': article.text,
+        'summary': article.summary,
+        'keywords': article.keywords,
+        'publish_date': article.publish_date,
+        'url': url
+    }
+
+def download_article(url: str) -> str:
+    """Download an article page over the shared session, rate-limited per domain"""
+    from urllib.parse import urlparse
+    
+    def download():
+        response = get_api_session().get(
+            url, headers={'User-Agent': FEED_USER_AGENT}, timeout=FULLTEXT_REQUEST_TIMEOUT
+        )
+        if response.status_code in RETRYABLE_STATUSES:
+            raise RetryableHTTPError(response.status_code, parse_retry_after(response.headers.get('Retry-After')))
+        response.raise_for_status()
+        return response.text
+    
+    return call_with_retry('fulltext', urlparse(url).netloc.lower(), download)
+
 def fetch_article_content(url: str) -> Optional[Dict[str, Any]]:
     """Fetch and parse article content"""
     try:
-        article = Article(url)
-        article.download()
-        article.parse()
-        article.nlp()
-        
-        return {
-            'title': article.title,
-            'text': article.text,
-            'summary': article.summary,
-            'keywords': article.keywords,
-            'publish_date': article.publish_date,
-            'url': url
-        }
+        return parse_article_html(url, download_article(url))
     except Exception as e:
-        print(f"Error fetching article content from {url}: {str(e)}")
+        logger.warning("Error fetching article content", extra=fields(url=url, error=str(e)))
         return None
 
-def fetch_news(source: Dict[str, Any]) -> List[Dict[str, Any]]:
+def fetch_news(source: Dict[str, Any], only_new: bool = False, raise_errors: bool = False) -> List[Dict[str, Any]]:
     """Fetch news from RSS feed"""
     articles = []
-    entries = fetch_rss_feed(source)
+    entries = fetch_rss_feed(source, only_new, raise_errors)
+    # Cleaning is timed per feed; a span per entry would cost about as much as the cleaning
+    clean_time = 0.0
     
     for entry in entries[:MAX_RSS_ITEMS]:
         try:
             # Clean description of HTML tags
-            description = BeautifulSoup(entry.get('description', ''), 'html.parser').get_text()
+            started = time.perf_counter()
+            description = clean_html(entry.get('description', ''))
+            clean_time += time.perf_counter() - started
             
             # Handle missing publish date gracefully
             publish_date = entry.get('published', entry.get('pubDate', entry.get('date', '')))
@@ -140,26 +277,80 @@ def fetch_news(source: Dict[str, Any]) -> List[Dict[str, Any]]:
                 'url': entry.get('link', ''),
                 'source_name': entry.get('source_name', source['name']),
                 'publish_date': publish_date,
-                'categories': entry.get('categories', [])
+                'categories': entry.get('categories', []),
+                # Identity used by incremental ingestion
+                'rss_url': source['rss_url'],
+                'entry_key': entry_key(entry),
+                'content_hash': content_hash(entry),
+                'published_ts': entry_timestamp(entry)
             })
         except Exception as e:
-            print(f"Error processing article from {source['name']}: {str(e)}")
+            inc('articles_dropped_total', source=source['name'], reason='invalid_entry')
+            logger.warning("Error processing article", extra=fields(source=source['name'], error=str(e)))
             continue
-            
+    
+    if entries:
+        observe('stage_seconds', clean_time, stage='html_clean', source=source['name'])
+    inc('articles_fetched_total', len(articles), source=source['name'])
     return articles
 
-def analyze_article(article: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+def build_analysis_result(article: Dict[str, Any], analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Attach an analysis to the article it was produced for"""
+    return {
+        'title': article['title'],
+        'url': article['url'],
+        'source': article['source_name'],
+        # The feed summary the pre-filter scores (not a full text swapped in for the prompt)
+        'summary': article.get('rss_summary', article.get('summary', '')),
+        'analysis': analysis,
+        'category': analysis['category'],
+        'publish_date': article.get('publish_date', ''),
+        'published_ts': article.get('published_ts')
+    }
+
+# First characters allowed for each top-level value of a single-article analysis
+ANALYSIS_VALUE_TYPES = {
+    'category': '"',
+    'key_insights': '[',
+    'risks_opportunities': '{',
+    'relevance_score': '-0123456789."'
+}
+
+def validate_analysis(analysis: Any) -> Dict[str, Any]:
+    """Check an analysis against the expected structure and normalize its fields"""
+    # Validate the analysis structure
+    required_keys = ['category', 'key_insights', 'risks_opportunities', 'relevance_score']
+    if not isinstance(analysis, dict) or not all(key in analysis for key in required_keys):
+        raise ValueError("Missing required keys in analysis")
+    
+    if analysis['category'] not in CATEGORIES:
+        analysis['category'] = 'Climate Risk'  # Default category
+    
+    # Ensure relevance_score is within bounds
+    analysis['relevance_score'] = max(1, min(10, int(analysis['relevance_score'])))
+    return analysis
+
+def analyze_article(article: Dict[str, Any], api_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
     """Analyze article using AI"""
     try:
-        client = get_openai_client()
+        # Identical prompt inputs were already analyzed; skip the API call
+        cache = get_analysis_cache()
+        cache_key = make_cache_key(article)
+        cached = cache.get(cache_key)
+        if cached:
+            return build_analysis_result(article, cached)
+        
+        client = get_openai_client(api_key)
         if not client:
-            st.error("API client not initialized. Please check your API keys.")
+            # Runs on analysis worker threads, which cannot draw in the app; callers report failed articles
+            inc('analysis_failures_total', reason='no_client')
+            logger.warning("API client not initialized", extra=fields(title=article['title']))
             return None
             
         # Simplified prompt to reduce JSON parsing errors
-        response = client.chat.completions.create(
-            model="gemini-2.0-flash",
-            messages=[
+        analysis = complete_json(
+            client,
+            [
                 {
                     "role": "system",
                     "content": "You are an expert insurance and climate risk analyst. Provide analysis in valid JSON format only."
@@ -186,76 +377,188 @@ def analyze_article(article: Dict[str, Any]) -> Optional[Dict[str, Any]]:
                     Ensure relevance_score is between 1 and 10.
                     """
                 }
-            ]
+            ],
+            ANALYSIS_VALUE_TYPES
         )
-        
-        if response.choices[0].message.content:
-            content = response.choices[0].message.content.strip()
-            
-            # Clean up the JSON string
-            if '```json' in content:
-                content = content.split('```json')[1].split('```')[0]
-            elif '```' in content:
-                content = content.split('```')[1].split('```')[0]
-            
-            # Remove any leading/trailing whitespace or special characters
-            content = content.strip('` \n\r\t')
-            
-            # Parse the JSON
-            try:
-                analysis = json.loads(content)
-                
-                # Validate the analysis structure
-                required_keys = ['category', 'key_insights', 'risks_opportunities', 'relevance_score']
-                if not all(key in analysis for key in required_keys):
-                    raise ValueError("Missing required keys in analysis")
-                
-                if analysis['category'] not in CATEGORIES:
-                    analysis['category'] = 'Climate Risk'  # Default category
-                
-                # Ensure relevance_score is within bounds
-                analysis['relevance_score'] = max(1, min(10, int(analysis['relevance_score'])))
-                
-                return {
-                    'title': article['title'],
-                    'url': article['url'],
-                    'source': article['source_name'],
-                    'analysis': analysis,
-                    'category': analysis['category']
-                }
-            except json.JSONDecodeError as je:
-                print(f"JSON parsing error for article '{article['title']}': {str(je)}")
-                print(f"Problematic content: {content}")
-                return None
-                
+        analysis = validate_analysis(analysis)
+        cache.put(cache_key, analysis)
+        return build_analysis_result(article, analysis)
+    
+    except JSONStreamError as je:
+        inc('analysis_failures_total', reason='parse')
+        logger.warning("JSON parsing error", extra=fields(title=article['title'], error=str(je)))
+        return None
     except ValueError as ve:
         # Handle API key configuration error quietly
         return None
     except Exception as e:
-        print(f"Error analyzing article '{article['title']}': {str(e)}")
+        inc('analysis_failures_total', reason='error')
+        logger.warning("Error analyzing article", extra=fields(title=article['title'], error=str(e)))
         return None
 
-def fetch_research_papers(topic: str) -> List[Dict[str, Any]]:
-    """Fetch relevant research papers"""
+def _request_batch_analysis(client, articles: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Analyze several articles in one completion and return the raw analyses by article id"""
+    article_blocks = "\n\n".join(
+        f"""[id: {idx}]
+                    Title: {article['title']}
+                    Content: {article['summary']}
+                    Source: {article['source_name']}"""
+        for idx, article in enumerate(articles)
+    )
+    
+    parsed = complete_json(
+        client,
+        [
+            {
+                "role": "system",
+                "content": "You are an expert insurance and climate risk analyst. Provide analysis in valid JSON format only."
+            },
+            {
+                "role": "user",
+                "content": f"""
+                    Analyze each of the following articles and return a JSON object whose "articles" array
+                    has one object per article, each with exactly this structure:
+                    {{
+                        "articles": [
+                            {{
+                                "id": 0,
+                                "category": "Climate Risk",
+                                "key_insights": ["insight1", "insight2"],
+                                "risks_opportunities": {{
+                                    "risks": ["risk1", "risk2"],
+                                    "opportunities": ["opportunity1", "opportunity2"]
+                                }},
+                                "relevance_score": 5
+                            }}
+                        ]
+                    }}
+
+                    {article_blocks}
+
+                    Return every article id exactly once.
+                    Only use these categories: {', '.join(CATEGORIES)}
+                    Ensure relevance_score is between 1 and 10.
+                    """
+            }
+        ],
+        allow_array=True
+    )
+    
+    # Accept {"articles": [...]} or {"0": {...}} as well as a bare array
+    if isinstance(parsed, dict):
+        if isinstance(parsed.get('articles'), list):
+            parsed = parsed['articles']
+        else:
+            parsed = [dict(value, id=key) for key, value in parsed.items() if isinstance(value, dict)]
+    
+    return {
+        str(item.get('id')): item
+        for item in parsed
+        if isinstance(item, dict)
+    }
+
+def analyze_articles(
+    articles: List[Dict[str, Any]],
+    batch_size: Optional[int] = None,
+    api_key: Optional[str] = None
+) -> List[Optional[Dict[str, Any]]]:
+    """Analyze articles several per request.
+
+    Returns one result per input article, in order (None where analysis failed).
+    Items missing or invalid in a batch response are re-submitted one at a time;
+    a batch request that fails outright leaves all of its articles at None.
+    """
+    batch_size = batch_size or ANALYSIS_BATCH_SIZE
+    results: List[Optional[Dict[str, Any]]] = [None] * len(articles)
+    cache = get_analysis_cache()
+    
+    # Serve whatever is already cached and batch the rest
+    pending = []
+    for idx, article in enumerate(articles):
+        cached = cache.get(make_cache_key(article))
+        if cached:
+            results[idx] = build_analysis_result(article, cached)
+        else:
+            pending.append(idx)
+    
+    if not pending:
+        return results
+    
+    client = get_openai_client(api_key)
+    if not client:
+        return results
+    
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start:start + batch_size]
+        retry = []
+        
+        if len(chunk) == 1:
+            retry = chunk
+        else:
+            try:
+                raw = _request_batch_analysis(client, [articles[idx] for idx in chunk])
+            except Exception as e:
+                # Throttled, unreachable or unparseable after every retry: splitting the batch into
+                # single requests would multiply the load, so leave it to the retry queue
+                inc('analysis_failures_total', len(chunk), reason='batch')
+                logger.warning("Error analyzing batch", extra=fields(articles=len(chunk), error=str(e)))
+                continue
+            
+            for position, idx in enumerate(chunk):
+                article = articles[idx]
+                try:
+                    analysis = validate_analysis(raw[str(position)])
+                except (KeyError, TypeError, ValueError):
+                    retry.append(idx)
+                    continue
+                analysis.pop('id', None)
+                cache.put(make_cache_key(article), analysis)
+                results[idx] = build_analysis_result(article, analysis)
+        
+        for idx in retry:
+            results[idx] = analyze_article(articles[idx], api_key)
+    
+    return results
+
+def get_tavily_key(api_key: Optional[str] = None) -> Optional[str]:
+    """Resolve the Tavily key: explicit, then session state, then config"""
+    if api_key:
+        return api_key
+    session_state = get_session_state()
+    if session_state is not None and session_state.get('tavily_key'):
+        return session_state.tavily_key
+    import config
+    return config.TAVILY_API_KEY
+
+def _search_research_papers(topic: str, domains: tuple, max_results: int,
+                            api_key: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+    """Run one Tavily search; returns None when the lookup failed"""
     try:
         headers = {
             'Content-Type': 'application/json',
-            'api-key': TAVILY_API_KEY
+            'api-key': api_key
         }
         
         data = {
             'query': f"latest research papers on {topic} in insurance and climate risk",
             'search_depth': 'advanced',
-            'max_results': MAX_RESEARCH_PAPERS,
-            'include_domains': RESEARCH_DOMAINS
+            'max_results': max_results,
+            'include_domains': list(domains)
         }
         
-        response = requests.post(
-            'https://api.tavily.com/search',
-            headers=headers,
-            json=data,
-            timeout=10
-        )
+        def search():
+            response = get_api_session().post(
+                TAVILY_SEARCH_URL,
+                headers=headers,
+                json=data,
+                timeout=RESEARCH_REQUEST_TIMEOUT
+            )
+            if response.status_code in RETRYABLE_STATUSES:
+                raise RetryableHTTPError(response.status_code, parse_retry_after(response.headers.get('Retry-After')))
+            return response
+        
+        with span('research_search'):
+            response = call_with_retry('tavily', api_key, search)
         
         if response.status_code == 200:
             results = response.json().get('results', [])
@@ -268,24 +571,74 @@ def fetch_research_papers(topic: str) -> List[Dict[str, Any]]:
                 }
                 for result in results
             ]
+        logger.warning("Research lookup failed", extra=fields(topic=topic, status=response.status_code))
     except Exception as e:
-        print(f"Error fetching research papers: {str(e)}")
-    return []
+        logger.warning("Error fetching research papers", extra=fields(topic=topic, error=str(e)))
+    return None
+
+# Research lookups memoized per (topic, domains, max_results), plus in-flight requests
+research_cache: Dict[tuple, tuple] = {}
+_research_inflight: Dict[tuple, Future] = {}
+_research_lock = threading.Lock()
+
+def fetch_research_papers(
+    topic: str,
+    domains: Optional[List[str]] = None,
+    max_results: Optional[int] = None,
+    api_key: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Fetch relevant research papers.
+
+    Results are cached for RESEARCH_CACHE_TTL (failures for RESEARCH_FAILURE_TTL),
+    and concurrent calls for the same lookup share a single request.
+    """
+    key = (topic, tuple(domains or RESEARCH_DOMAINS), max_results or MAX_RESEARCH_PAPERS)
+    
+    with _research_lock:
+        cached = research_cache.get(key)
+        if cached and time.time() < cached[0]:
+            inc('research_cache_total', result='hit')
+            return cached[1]
+        
+        future = _research_inflight.get(key)
+        owner = future is None
+        inc('research_cache_total', result='miss' if owner else 'coalesced')
+        if owner:
+            future = Future()
+            _research_inflight[key] = future
+    
+    if not owner:
+        return future.result()
+    
+    results: List[Dict[str, Any]] = []
+    try:
+        found = _search_research_papers(*key, api_key=get_tavily_key(api_key))
+        results = found or []
+        ttl = RESEARCH_CACHE_TTL if found is not None else RESEARCH_FAILURE_TTL
+        with _research_lock:
+            research_cache[key] = (time.time() + ttl, results)
+    finally:
+        with _research_lock:
+            _research_inflight.pop(key, None)
+        future.set_result(results)
+    return results
+
+def prefetch_research_papers(topics: List[str], api_key: Optional[str] = None, max_workers: int = 6):
+    """Warm the research cache for several topics in parallel"""
+    api_key = get_tavily_key(api_key)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='research') as pool:
+        list(pool.map(lambda topic: fetch_research_papers(topic, api_key=api_key), topics))
 
 def format_report(articles: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Format analyzed articles into a report"""
-    category_counts = {}
-    for article in articles:
-        category = article.get('category', 'Uncategorized')
-        category_counts[category] = category_counts.get(category, 0) + 1
+    from analytics import ArchiveAnalytics
+    analytics = ArchiveAnalytics()
+    analytics.add_records(articles)
     
     return {
         'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         'articles': articles,
-        'summary': {
-            'total_articles': len(articles),
-            'categories': category_counts
-        }
+        'summary': analytics.summary()
     }
 
 def extract_category(text):